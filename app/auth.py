@@ -1,19 +1,101 @@
 """
 Модуль для основных операций, связанных с аутентификацией.
 """
+import asyncio
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
 
 import jwt
+import redis.asyncio as redis
+from loguru import logger
 from passlib.context import CryptContext
-from sqlalchemy import select
+from sqlalchemy import update
 
+from app.cache import TTLCache
 from app.config import config
 from app.dependencies import AsyncDBSession, Token
-from app.exceptions import BadCredentialsError, ExpiredTokenError
+from app.exceptions import BadCredentialsError, ExpiredTokenError, PasswordHasherBusyError
+from app.metrics import (
+    PASSWORD_HASH_PENDING,
+    PASSWORD_HASH_QUEUE_SECONDS,
+    PASSWORD_HASH_REJECTED,
+    PASSWORD_HASH_SECONDS,
+)
 from app.models.users import User as UserModel
+from app.statements import ACTIVE_USER_BY_EMAIL, USER_STATUS
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# user_id -> (is_active, token_version) для быстрого пути аутентификации.
+user_status_cache = TTLCache(maxsize=config.AUTH_USER_CACHE_SIZE,
+                             ttl=config.AUTH_USER_CACHE_TTL)
+
+# Канал Redis, по которому воркеры сообщают id пользователей
+# с отозванными токенами.
+REVOCATION_CHANNEL = "auth:revoked"
+REVOCATION_RECONNECT_SECONDS = 1
+
+
+class RevocationListener:
+    """
+    Подписка воркера на отзывы токенов, сделанные на других воркерах.
+    Сообщение с id пользователя удаляет из кэша статусов только его
+    запись, а на обычных запросах к Redis никто не обращается.
+    Сообщения, отправленные во время обрыва связи с Redis, теряются,
+    поэтому после каждой подписки кэш сбрасывается целиком.
+    """
+
+    def __init__(self, client: redis.Redis | None):
+        self.client = client
+        self._task: asyncio.Task | None = None
+
+    async def publish(self, user_id: int) -> None:
+        if self.client is None:
+            return
+        try:
+            await self.client.publish(REVOCATION_CHANNEL, user_id)
+        except redis.RedisError as exc:
+            logger.warning(f"Failed to publish token revocation: {exc}")
+
+    def start(self) -> None:
+        if self.client is not None and self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.client.pubsub() as pubsub:
+                    await pubsub.subscribe(REVOCATION_CHANNEL)
+                    user_status_cache.clear()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            user_status_cache.pop(int(message["data"]))
+            except redis.RedisError as exc:
+                logger.warning(f"Token revocation channel unavailable: {exc}")
+                await asyncio.sleep(REVOCATION_RECONNECT_SECONDS)
+
+
+revocation_listener = RevocationListener(
+    redis.from_url(config.REDIS_URL) if config.REDIS_URL else None)
+
+
+@dataclass(frozen=True, slots=True)
+class TokenUser:
+    """Пользователь, восстановленный из claims токена без загрузки из БД."""
+
+    id: int
+    email: str
+    role: str
+
 
 def hash_password(password: str) -> str:
     """Преобразует пароль в хэш с использованием bcrypt."""
@@ -25,8 +107,75 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+class PasswordHasher:
+    """
+    Выполняет bcrypt в отдельном пуле потоков, не блокируя event loop.
+    bcrypt отпускает GIL, поэтому пула потоков достаточно. Число задач
+    в работе и в очереди ограничено: при переполнении запрос сразу
+    получает 503 вместо ожидания в растущей очереди.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix="password-hasher")
+
+    async def run(self, operation: str, func: Callable, *args):
+        if self.pending >= self.max_pending:
+            PASSWORD_HASH_REJECTED.labels(operation).inc()
+            raise PasswordHasherBusyError
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            PASSWORD_HASH_QUEUE_SECONDS.labels(operation).observe(started - submitted)
+            try:
+                return func(*args)
+            finally:
+                PASSWORD_HASH_SECONDS.labels(operation).observe(
+                    time.perf_counter() - started)
+
+        self.pending += 1
+        PASSWORD_HASH_PENDING.inc()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, job)
+        finally:
+            self.pending -= 1
+            PASSWORD_HASH_PENDING.dec()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher(workers=config.PASSWORD_HASH_WORKERS,
+                                 max_pending=config.PASSWORD_HASH_MAX_PENDING)
+
+
+async def hash_password_async(password: str) -> str:
+    """Хэширует пароль в пуле потоков."""
+    return await password_hasher.run("hash", hash_password, password)
+
+
+async def verify_and_update_password(
+        plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Проверяет пароль в пуле потоков. Если параметры pwd_context изменились,
+    вторым элементом возвращает новый хэш, который нужно сохранить.
+    """
+    return await password_hasher.run(
+        "verify", pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+def token_claims(user: UserModel) -> dict:
+    """Claims, которые записываются в access- и refresh-токены."""
+    return {"sub": user.email, "role": user.role, "id": user.id,
+            "ver": user.token_version}
+
+
 def create_access_token(data: dict):
-    """Создаёт JWT с payload(sub, role, id, exp)."""
+    """Создаёт JWT с payload(sub, role, id, ver, exp)."""
     to_encode = data.copy()
     expire = datetime.now(UTC) + timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
@@ -41,19 +190,65 @@ def create_refresh_token(data: dict):
     return jwt.encode(to_encode, config.SECRET_KEY, algorithm=config.ALGORITHM)
 
 
-async def get_current_user(token: Token, db: AsyncDBSession):
-    """Проверяет JWT и возвращает пользователя из базы данных."""
+def decode_access_token(token: str) -> dict:
+    """Проверяет подпись и срок действия JWT и возвращает payload."""
     try:
         payload = jwt.decode(token, config.SECRET_KEY, algorithms=[config.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise BadCredentialsError
     except jwt.ExpiredSignatureError:
         raise ExpiredTokenError from None
     except jwt.PyJWTError:
         raise BadCredentialsError from None
-    user = await db.scalar(select(UserModel).where(
-        UserModel.email == email, UserModel.is_active))
-    if user is None:
+    if payload.get("sub") is None:
+        raise BadCredentialsError
+    return payload
+
+
+async def get_user_from_claims(payload: dict, db: AsyncDBSession) -> TokenUser:
+    """
+    Быстрый путь: роль и id берутся из токена. В БД запрашиваются только
+    активность и версия токенов, и только при промахе кэша.
+    """
+    user_id, role = payload.get("id"), payload.get("role")
+    if not isinstance(user_id, int) or role is None:
+        raise BadCredentialsError
+    status = user_status_cache.get(user_id)
+    if status is None:
+        row = (await db.execute(USER_STATUS, {"id": user_id})).first()
+        status = (row.is_active, row.token_version) if row else (False, 0)
+        user_status_cache.set(user_id, status)
+    is_active, token_version = status
+    if not is_active or payload.get("ver", 0) != token_version:
+        raise BadCredentialsError
+    return TokenUser(id=user_id, email=payload["sub"], role=role)
+
+
+async def get_current_user(token: Token, db: AsyncDBSession):
+    """Проверяет JWT и возвращает текущего пользователя."""
+    payload = decode_access_token(token)
+    if config.AUTH_FAST_PATH:
+        return await get_user_from_claims(payload, db)
+    user = await db.scalar(ACTIVE_USER_BY_EMAIL, {"email": payload["sub"]})
+    if user is None or payload.get("ver", 0) != user.token_version:
         raise BadCredentialsError
     return user
+
+
+async def revoke_tokens(db: AsyncDBSession, user_id: int) -> None:
+    """
+    Отзывает все выданные пользователю access- и refresh-токены,
+    увеличивая token_version.
+
+    Refresh-токены и access-токены без AUTH_FAST_PATH сверяются с БД
+    и перестают приниматься сразу. На быстром пути запись пользователя
+    в кэше статусов удаляется на этом воркере, а на остальных — по
+    сообщению RevocationListener, если задан REDIS_URL. Без Redis или
+    при его недоступности другие воркеры принимают отозванный
+    access-токен до истечения их записи в кэше, то есть не дольше
+    AUTH_USER_CACHE_TTL секунд.
+    """
+    await db.execute(
+        update(UserModel).where(UserModel.id == user_id)
+        .values(token_version=UserModel.token_version + 1))
+    await db.commit()
+    user_status_cache.pop(user_id)
+    await revocation_listener.publish(user_id)
@@ -0,0 +1,210 @@
+"""
+Модуль массовой загрузки товаров продавца из CSV или NDJSON.
+
+Тело запроса читается потоком и разбирается построчно. Строки
+валидируются ProductImportRow и записываются пачками по BULK_BATCH_SIZE:
+категории пачки проверяются одним запросом, а товары сохраняются одним
+многострочным INSERT ... ON CONFLICT (seller_id, sku) DO UPDATE, то есть
+повторная загрузка того же SKU обновляет товар (и снова делает активным
+удалённый), после чего строки витрины каталога для пачки пересобираются
+одним запросом. Каждая пачка — отдельная транзакция: если БД отклонила
+пачку, она откатывается, её строки попадают в отчёт как ошибочные,
+а загрузка продолжается со следующей пачки.
+"""
+import codecs
+import csv
+import json
+import time
+from collections.abc import AsyncIterator
+
+from fastapi import Request
+from loguru import logger
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import config
+from app.crud import sync_product_listings
+from app.exceptions import UnsupportedImportFormatError
+from app.models.categories import Category
+from app.models.products import Product
+from app.schemas import BulkImportResult, BulkRowError, ProductImportRow
+
+CSV_MEDIA_TYPES = {"text/csv"}
+NDJSON_MEDIA_TYPES = {"application/x-ndjson", "application/jsonl",
+                      "application/json-lines"}
+
+UPSERT_COLUMNS = ("name", "description", "price", "image_url", "stock",
+                  "category_id", "is_active")
+
+
+async def iter_lines(request: Request) -> AsyncIterator[str]:
+    """Построчно декодирует тело запроса по мере его получения."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    tail = ""
+    async for chunk in request.stream():
+        tail += decoder.decode(chunk)
+        *lines, tail = tail.split("\n")
+        for line in lines:
+            yield line
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def iter_csv_records(
+        lines: AsyncIterator[str]) -> AsyncIterator[dict | str]:
+    """
+    Возвращает строки CSV как словари по заголовку. Запись может занимать
+    несколько строк файла, пока в ней не закрыты кавычки. Пустые ячейки
+    считаются отсутствующими значениями.
+    """
+    header = None
+    record = ""
+    async for line in lines:
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue
+        values = next(csv.reader([record.rstrip("\r")]), [])
+        record = ""
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if not values:
+            yield ""
+            continue
+        if len(values) != len(header):
+            yield f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield {name: value for name, value in zip(header, values, strict=True)
+               if value != ""}
+    if record:
+        yield "Unterminated quoted field"
+
+
+async def iter_ndjson_records(
+        lines: AsyncIterator[str]) -> AsyncIterator[dict | str]:
+    async for line in lines:
+        if not line.strip():
+            yield ""
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield f"Invalid JSON: {exc}"
+            continue
+        yield (record if isinstance(record, dict)
+               else "Row must be a JSON object")
+
+
+def iter_records(request: Request) -> AsyncIterator[dict | str]:
+    """
+    Выбирает разбор по Content-Type. Возвращает словарь для разобранной
+    строки, текст ошибки для неразобранной и пустую строку для пропуска.
+    """
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if media_type in CSV_MEDIA_TYPES:
+        return iter_csv_records(iter_lines(request))
+    if media_type in NDJSON_MEDIA_TYPES:
+        return iter_ndjson_records(iter_lines(request))
+    raise UnsupportedImportFormatError
+
+
+class BulkImport:
+    """Состояние одной загрузки: текущая пачка, счётчики и отчёт об ошибках."""
+
+    def __init__(self, db: AsyncSession, seller_id: int):
+        self.db = db
+        self.seller_id = seller_id
+        self.batch: dict[str, tuple[int, ProductImportRow]] = {}
+        self.rows = 0
+        self.upserted = 0
+        self.failed = 0
+        self.errors: list[BulkRowError] = []
+
+    def fail(self, row: int, *errors: str) -> None:
+        self.failed += 1
+        if len(self.errors) < config.BULK_MAX_ERRORS:
+            self.errors.append(BulkRowError(row=row, errors=list(errors)))
+
+    async def add(self, row: int, record: dict) -> None:
+        try:
+            product = ProductImportRow.model_validate(record)
+        except ValidationError as exc:
+            self.fail(row, *(
+                f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                for error in exc.errors()
+            ))
+            return
+        # Один SKU может встретиться в пачке только один раз, иначе
+        # ON CONFLICT DO UPDATE затронет строку дважды. Побеждает последняя.
+        previous = self.batch.pop(product.sku, None)
+        if previous is not None:
+            self.fail(previous[0], f"Duplicate sku, replaced by row {row}")
+        self.batch[product.sku] = (row, product)
+        if len(self.batch) >= config.BULK_BATCH_SIZE:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self.batch:
+            return
+        batch, self.batch = list(self.batch.values()), {}
+        category_ids = {product.category_id for _, product in batch}
+        active = set(await self.db.scalars(select(Category.id).where(
+            Category.id.in_(category_ids), Category.is_active)))
+        rows, values = [], []
+        for row, product in batch:
+            if product.category_id not in active:
+                self.fail(row, "category_id: Category not found")
+                continue
+            rows.append(row)
+            values.append({**product.model_dump(), "seller_id": self.seller_id,
+                           "is_active": True})
+        if not values:
+            return
+        stmt = insert(Product).values(values)
+        try:
+            product_ids = list(await self.db.scalars(
+                stmt.on_conflict_do_update(
+                    index_elements=["seller_id", "sku"],
+                    set_={column: stmt.excluded[column]
+                          for column in UPSERT_COLUMNS},
+                ).returning(Product.id)))
+            await sync_product_listings(self.db, Product.id.in_(product_ids))
+            await self.db.commit()
+        except DBAPIError as exc:
+            await self.db.rollback()
+            reason = str(exc.orig).splitlines()[0]
+            logger.warning(f"Bulk import batch rejected: {reason}")
+            for row in rows:
+                self.fail(row, f"Batch rejected by database: {reason}")
+            return
+        self.upserted += len(values)
+
+
+async def import_products(request: Request, db: AsyncSession,
+                          seller_id: int) -> BulkImportResult:
+    """Загружает товары продавца из тела запроса и возвращает отчёт."""
+    records = iter_records(request)
+    started = time.perf_counter()
+    bulk = BulkImport(db, seller_id)
+    async for record in records:
+        if record == "":
+            continue
+        bulk.rows += 1
+        if isinstance(record, str):
+            bulk.fail(bulk.rows, record)
+        else:
+            await bulk.add(bulk.rows, record)
+    await bulk.flush()
+    seconds = time.perf_counter() - started
+    return BulkImportResult(
+        rows=bulk.rows,
+        upserted=bulk.upserted,
+        failed=bulk.failed,
+        errors=bulk.errors,
+        seconds=round(seconds, 3),
+        rows_per_second=round(bulk.rows / seconds, 1) if seconds else 0.0,
+    )
@@ -0,0 +1,94 @@
+"""
+Модуль с примитивами in-process кэширования.
+
+TTLCache — ограниченный по размеру LRU-кэш с временем жизни записей.
+Счётчики версий позволяют согласовать локальные кэши нескольких
+gunicorn-воркеров: запись на любом воркере увеличивает версию,
+и остальные воркеры при следующем чтении видят, что их копия устарела.
+"""
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+import redis.asyncio as redis
+
+from app.config import config
+
+
+class TTLCache:
+    """LRU-кэш на OrderedDict с ограничением размера и TTL записей."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Возвращает значение по ключу или default, если записи нет или она истекла."""
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """Сохраняет значение, вытесняя самые давно использованные записи."""
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+class LocalVersion:
+    """Счётчик версий внутри процесса. Подходит для одного воркера."""
+
+    def __init__(self):
+        self._value = 0
+
+    async def get(self) -> int:
+        return self._value
+
+    async def bump(self) -> int:
+        self._value += 1
+        return self._value
+
+
+class RedisVersion:
+    """Счётчик версий в Redis, общий для всех воркеров."""
+
+    def __init__(self, client: redis.Redis, key: str):
+        self.client = client
+        self.key = key
+
+    async def get(self) -> int:
+        return int(await self.client.get(self.key) or 0)
+
+    async def bump(self) -> int:
+        return await self.client.incr(self.key)
+
+
+def make_version(key: str) -> LocalVersion | RedisVersion:
+    """Выбирает счётчик версий: Redis, если задан REDIS_URL, иначе локальный."""
+    if config.REDIS_URL:
+        return RedisVersion(redis.from_url(config.REDIS_URL), key)
+    return LocalVersion()
@@ -0,0 +1,118 @@
+"""
+Модуль с кэшем активных категорий.
+
+Категории меняются редко, а проверяются почти в каждом запросе к товарам,
+поэтому весь набор активных категорий и связи родитель-потомок хранятся
+в памяти воркера. Снимок перечитывается одним запросом, когда истекает
+TTL или меняется общая версия, которую увеличивают обработчики записи
+в app.routers.categories.
+"""
+from dataclasses import dataclass, field
+from functools import cached_property
+
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import TTLCache, make_version
+from app.config import config
+from app.models.categories import Category as CategoryModel
+from app.replicas import repeat_after_replica_lag
+from app.schemas import Category as CategorySchema
+
+SNAPSHOT_KEY = "active"
+CATEGORY_LIST = TypeAdapter(list[CategorySchema])
+
+
+@dataclass
+class CategorySnapshot:
+    """Неизменяемый снимок активных категорий определённой версии."""
+
+    version: int
+    categories: list[CategorySchema]
+    by_id: dict[int, CategorySchema] = field(init=False)
+
+    def __post_init__(self):
+        self.by_id = {category.id: category for category in self.categories}
+
+    @cached_property
+    def tree(self) -> list[dict]:
+        """
+        Дерево активных категорий, собранное за O(n). Корнями считаются
+        категории без родителя или с неактивным родителем.
+        """
+        nodes = {
+            category.id: {**category.model_dump(), "children": []}
+            for category in self.categories
+        }
+        roots = []
+        for category in self.categories:
+            parent = nodes.get(category.parent_id)
+            if parent is None:
+                roots.append(nodes[category.id])
+            else:
+                parent["children"].append(nodes[category.id])
+        return roots
+
+    @cached_property
+    def categories_json(self) -> bytes:
+        """Список категорий в JSON, сериализуется один раз на снимок."""
+        return CATEGORY_LIST.dump_json(self.categories)
+
+    @cached_property
+    def tree_json(self) -> bytes:
+        return to_json(self.tree)
+
+    @cached_property
+    def expanded_json(self) -> bytes:
+        """Список категорий с активным родителем (expand=parent)."""
+        return to_json([
+            {**category.model_dump(),
+             "parent": (self.by_id[category.parent_id].model_dump()
+                        if category.parent_id in self.by_id else None)}
+            for category in self.categories
+        ])
+
+
+class CategoryCache:
+    def __init__(self, ttl: float):
+        self.hits = 0
+        self.misses = 0
+        self._cache = TTLCache(maxsize=1, ttl=ttl)
+        self._version = make_version("cache:categories:version")
+
+    async def snapshot(self, db: AsyncSession) -> CategorySnapshot:
+        """Возвращает актуальный снимок, при необходимости перечитывая его из БД."""
+        # Версия читается до запроса к БД: если её увеличат во время
+        # загрузки, снимок окажется помечен старой версией и будет
+        # перечитан при следующем обращении.
+        version = await self._version.get()
+        snapshot = self._cache.get(SNAPSHOT_KEY)
+        if snapshot is not None and snapshot.version == version:
+            self.hits += 1
+            return snapshot
+        self.misses += 1
+        categories = await db.scalars(
+            select(CategoryModel).where(CategoryModel.is_active))
+        snapshot = CategorySnapshot(version, [
+            CategorySchema.model_validate(category) for category in categories
+        ])
+        self._cache.set(SNAPSHOT_KEY, snapshot)
+        return snapshot
+
+    async def get(self, db: AsyncSession, category_id: int) -> CategorySchema | None:
+        """Возвращает активную категорию по ID или None."""
+        return (await self.snapshot(db)).by_id.get(category_id)
+
+    async def invalidate(self) -> None:
+        """Сбрасывает снимок на всех воркерах. Вызывается после коммита."""
+        self._cache.clear()
+        await self._version.bump()
+        repeat_after_replica_lag(self._version.bump)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+category_cache = CategoryCache(ttl=config.CATEGORY_CACHE_TTL)
@@ -1,9 +1,18 @@
 from celery import Celery
 
+from app.config import config
+
 celery = Celery(
     __name__,
-    broker="redis://127.0.0.1:6379/0",
-    backend="redis://127.0.0.1:6379/0",
+    broker=config.CELERY_BROKER_URL,
+    backend=config.CELERY_RESULT_BACKEND,
     broker_connection_retry_on_startup=True,
     include=["app.tasks"]
 )
+celery.conf.task_always_eager = config.CELERY_TASK_ALWAYS_EAGER
+celery.conf.beat_schedule = {
+    "release-expired-reservations": {
+        "task": "app.tasks.release_expired_reservations",
+        "schedule": 60.0,
+    },
+}
@@ -0,0 +1,45 @@
+"""
+Служебные команды для запуска вручную или по расписанию:
+
+    python -m app.commands reconcile-ratings
+    python -m app.commands sync-listings
+"""
+import argparse
+import asyncio
+
+from loguru import logger
+
+from app.crud import reconcile_product_ratings, sync_product_listings
+from app.database import async_session_maker
+
+
+async def reconcile_ratings() -> None:
+    """Пересчитывает агрегаты оценок всех товаров."""
+    async with async_session_maker() as session:
+        updated = await reconcile_product_ratings(session)
+    logger.info(f"Reconciled ratings of {updated} products")
+
+
+async def sync_listings() -> None:
+    """Пересобирает витрину каталога целиком."""
+    async with async_session_maker() as session:
+        await sync_product_listings(session)
+        await session.commit()
+    logger.info("Product listings rebuilt")
+
+
+COMMANDS = {
+    "reconcile-ratings": reconcile_ratings,
+    "sync-listings": sync_listings,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.commands")
+    parser.add_argument("command", choices=COMMANDS)
+    args = parser.parse_args()
+    asyncio.run(COMMANDS[args.command]())
+
+
+if __name__ == "__main__":
+    main()
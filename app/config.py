@@ -1,11 +1,96 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Config(BaseSettings):
+    DATABASE_URL: str = "postgresql+asyncpg://ecommerce_user:12345678@db:5432/ecommerce_db"
+    DB_ECHO: bool = False
+    # Пул соединений создаётся в каждом gunicorn-воркере отдельно:
+    # суммарно к Postgres открывается до
+    # workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) соединений.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Соединения, открываемые при запуске воркера (не больше DB_POOL_SIZE),
+    # таймаут проверки БД в /health/ready и максимальное ожидание
+    # фоновых задач при остановке воркера.
+    DB_POOL_WARMUP: int = 5
+    HEALTH_CHECK_TIMEOUT: float = 2
+    SHUTDOWN_TIMEOUT: float = 10
+    # Режим для PgBouncer в transaction pooling: без пула на стороне
+    # приложения и без именованных prepared statements между транзакциями.
+    DB_PGBOUNCER: bool = False
+    # Реплики для чтения, URL через запятую. GET-обработчики каталога
+    # и отзывов читают с реплик, при их недоступности — с основной БД.
+    DB_REPLICA_URLS: str = ""
+    DB_REPLICA_SELECTION: Literal["round_robin", "least_connections"] = "round_robin"
+    # Период фоновой проверки реплик и допустимое отставание в секундах:
+    # отстающая или недоступная реплика исключается до следующей проверки.
+    DB_REPLICA_CHECK_INTERVAL: float = 10
+    DB_REPLICA_MAX_LAG: float = 5
+    # Read-your-writes: столько секунд после запроса на запись с тем же
+    # заголовком Authorization чтения идут в основную БД.
+    DB_READ_YOUR_WRITES_SECONDS: float = 5
+    # Доля успешных (2xx/3xx) запросов, попадающих в access-лог.
+    LOG_SUCCESS_SAMPLE_RATE: float = 1.0
+    # Размер пачки строк серверного курсора при потоковой выгрузке.
+    STREAM_BATCH_SIZE: int = 500
+    # Кэш ответов анонимных запросов к каталогу.
+    RESPONSE_CACHE_TTL: int = 60
+    RESPONSE_CACHE_SIZE: int = 1024
+    # Массовая загрузка товаров: строк в одном INSERT и максимум
+    # ошибок в отчёте (счётчик failed учитывает все ошибки).
+    BULK_BATCH_SIZE: int = 500
+    BULK_MAX_ERRORS: int = 1000
+    # Celery. Для тестов: CELERY_BROKER_URL=memory:// и
+    # CELERY_TASK_ALWAYS_EAGER=true.
+    CELERY_BROKER_URL: str = "redis://127.0.0.1:6379/0"
+    CELERY_RESULT_BACKEND: str = "redis://127.0.0.1:6379/0"
+    CELERY_TASK_ALWAYS_EAGER: bool = False
+    # Пересчёт оценки товара после записи отзыва в фоновой задаче
+    # вместо инкремента в транзакции запроса. Отзывы к одному товару,
+    # пришедшие в течение RATING_RECOMPUTE_DELAY секунд, дают один пересчёт.
+    BACKGROUND_RATING_UPDATES: bool = False
+    RATING_RECOMPUTE_DELAY: int = 5
+    SEARCH_REFRESH_DELAY: int = 30
+    # Время, на которое заказ резервирует товар до оплаты.
+    ORDER_RESERVATION_MINUTES: int = 15
+
     ALGORITHM: str = ""
     SECRET_KEY: str = ""
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 0
     REFRESH_TOKEN_EXPIRE_DAYS: int = 0
+    # Пустой REDIS_URL означает, что кэши работают только внутри процесса.
+    REDIS_URL: str = ""
+    CATEGORY_CACHE_TTL: int = 300
+    # Быстрый путь аутентификации: роль и id берутся из токена,
+    # а активность пользователя и версия токенов — из короткого кэша.
+    # Выход (revoke_tokens) удаляет запись пользователя из кэша всех
+    # воркеров через Redis pub/sub; без REDIS_URL, при недоступном Redis,
+    # а также после изменения is_active в обход revoke_tokens токен
+    # принимается ещё до AUTH_USER_CACHE_TTL секунд.
+    AUTH_FAST_PATH: bool = False
+    AUTH_USER_CACHE_TTL: int = 30
+    AUTH_USER_CACHE_SIZE: int = 10_000
+    # Пул потоков для bcrypt: число потоков и максимум задач в работе
+    # и в очереди, после которого запросы получают 503.
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    # Ограничение частоты запросов, лимиты в виде "<число>/<период>".
+    # Маршруты входа и регистрации ограничиваются по IP, а маршруты
+    # с PermissionChecker — по пользователю с лимитом его роли.
+    # RATE_LIMIT_ROLES в окружении задаётся JSON-объектом.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOGIN: str = "10/minute"
+    RATE_LIMIT_REFRESH: str = "30/minute"
+    RATE_LIMIT_REGISTER: str = "5/minute"
+    RATE_LIMIT_ROLES: dict[str, str] = {
+        "buyer": "120/minute", "seller": "300/minute", "admin": "600/minute"}
+    RATE_LIMIT_CACHE_SIZE: int = 100_000
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -1,9 +1,30 @@
 """Модуль с функциями для работы с базой данных."""
-from sqlalchemy import func, select, update
+from typing import Any, NoReturn
 
+from sqlalchemy import (
+    CTE,
+    Float,
+    Integer,
+    Update,
+    all_,
+    and_,
+    cast,
+    column,
+    func,
+    literal,
+    or_,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import array, insert
+
+from app.category_cache import category_cache
 from app.dependencies import AsyncDBSession
 from app.exceptions import (
     CategoryNotFound,
+    InsufficientStockError,
+    NotProductOwnerError,
     ParentCategoryNotFound,
     ProductCategoryNotFound,
     ProductNotFound,
@@ -11,17 +32,25 @@ from app.exceptions import (
     ReviewNotFoundError,
 )
 from app.models.categories import Category
+from app.models.orders import Order, OrderItem
+from app.models.product_listings import ProductListing
 from app.models.products import Product
 from app.models.reviews import Review
+from app.schemas import Category as CategorySchema
+from app.schemas import ReviewCreate
+from app.statements import (
+    ACTIVE_CATEGORY,
+    ACTIVE_PRODUCT,
+    ACTIVE_PRODUCT_SELLER_ID,
+    ACTIVE_PRODUCT_WITH_CATEGORY_STATUS,
+)
 
 
 async def get_category_or_404(db: AsyncDBSession, category_id: int) -> Category:
     """
     Проверка, активна ли категория товара.
     """
-    category = await db.scalar(select(Category).where(
-        Category.id == category_id, Category.is_active
-    ))
+    category = await db.scalar(ACTIVE_CATEGORY, {"id": category_id})
     if category is None:
         raise CategoryNotFound
     return category
@@ -31,9 +60,7 @@ async def get_parent_category_or_404(db: AsyncDBSession, category_id: int) -> Ca
     """
     Проверка, активна ли родительская категория.
     """
-    category = await db.scalar(select(Category).where(
-        Category.id == category_id, Category.is_active
-    ))
+    category = await db.scalar(ACTIVE_CATEGORY, {"id": category_id})
     if category is None:
         raise ParentCategoryNotFound
     return category
@@ -43,9 +70,7 @@ async def get_product_or_404(db: AsyncDBSession, product_id: int) -> Product:
     """
     Проверка, существует ли товар.
     """
-    product = await db.scalar(select(Product).where(
-        Product.id == product_id, Product.is_active
-    ))
+    product = await db.scalar(ACTIVE_PRODUCT, {"id": product_id})
     if product is None:
         raise ProductNotFound
     return product
@@ -56,36 +81,303 @@ async def get_product_category_or_400(
     """
     Проверка, активна ли категория найденного товара.
     """
-    category = await db.scalar(select(Category).where(
-        Category.id == category_id, Category.is_active
-    ))
+    category = await db.scalar(ACTIVE_CATEGORY, {"id": category_id})
     if category is None:
         raise ProductCategoryNotFound
     return category
 
 
-async def update_product_rating(db: AsyncDBSession, product_id: int) -> None:
-    """Обновление средней оценки товара."""
-    avg_grade = await db.scalar(select(func.avg(Review.grade)).where(
-        Review.is_active))
-    await db.execute(update(Product).where(Product.id == product_id)
-                     .values(rating=avg_grade))
+async def get_product_with_category_or_404(
+        db: AsyncDBSession, product_id: int) -> Product:
+    """
+    Проверка, существует ли товар и активна ли его категория,
+    одним запросом с join.
+    """
+    row = (await db.execute(ACTIVE_PRODUCT_WITH_CATEGORY_STATUS,
+                            {"id": product_id})).first()
+    if row is None:
+        raise ProductNotFound
+    product, category_is_active = row
+    if not category_is_active:
+        raise ProductCategoryNotFound
+    return product
+
+
+async def update_own_product_or_error(
+        db: AsyncDBSession, product_id: int, seller_id: int,
+        category_id: Any, **values) -> Product:
+    """
+    Изменяет товар одним UPDATE ... RETURNING, если товар активен,
+    принадлежит продавцу, а категория category_id активна.
+    category_id может быть выражением, например Product.category_id.
+    Причина отказа выясняется отдельным запросом только при ошибке.
+    """
+    category_is_active = select(Category.id).where(
+        Category.id == category_id, Category.is_active).exists()
+    product = await db.scalar(update(Product).where(
+        Product.id == product_id,
+        Product.is_active,
+        Product.seller_id == seller_id,
+        category_is_active,
+    ).values(**values).returning(Product))
+    if product is None:
+        await raise_product_write_error(db, product_id, seller_id)
+    await sync_product_listings(db, Product.id == product_id)
+    return product
+
+
+async def raise_product_write_error(
+        db: AsyncDBSession, product_id: int, seller_id: int) -> NoReturn:
+    """Определяет, почему продавец не смог изменить товар."""
+    owner_id = await db.scalar(ACTIVE_PRODUCT_SELLER_ID, {"id": product_id})
+    if owner_id is None:
+        raise ProductNotFound
+    if owner_id != seller_id:
+        raise NotProductOwnerError
+    raise ProductCategoryNotFound
+
+
+async def get_cached_category_or_404(
+        db: AsyncDBSession, category_id: int) -> CategorySchema:
+    """
+    Проверка, активна ли категория, по кэшу категорий.
+    Используется в обработчиках чтения.
+    """
+    category = await category_cache.get(db, category_id)
+    if category is None:
+        raise CategoryNotFound
+    return category
+
+
+async def change_product_rating(db: AsyncDBSession, product_id: int,
+                                grade: int, count: int) -> None:
+    """
+    Инкрементально обновляет оценку товара в текущей транзакции.
+    count=1 добавляет оценку grade, count=-1 — убирает её.
+    Коммит выполняет вызывающий код вместе с изменением отзыва.
+    """
+    rating_sum = Product.rating_sum + count * grade
+    rating_count = Product.rating_count + count
+    changed = update(Product).where(Product.id == product_id).values(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        rating=cast(rating_sum, Float) / func.nullif(rating_count, 0),
+    ).returning(Product.id, Product.rating,
+                Product.rating_count).cte("changed")
+    await db.execute(listing_update(changed, "rating", "rating_count"))
+
+
+async def reconcile_product_ratings(db: AsyncDBSession,
+                                    product_id: int | None = None) -> int:
+    """
+    Пересчитывает rating_sum/rating_count всех товаров или одного
+    товара product_id одним сгруппированным запросом. Обновляет только
+    расходящиеся строки и возвращает их количество.
+    """
+    totals = (
+        select(Product.id.label("product_id"),
+               func.coalesce(func.sum(Review.grade), 0).label("rating_sum"),
+               func.count(Review.id).label("rating_count"))
+        .outerjoin(Review, and_(Review.product_id == Product.id, Review.is_active))
+        .group_by(Product.id)
+    )
+    if product_id is not None:
+        totals = totals.where(Product.id == product_id)
+    totals = totals.subquery()
+    changed = update(Product).where(
+        Product.id == totals.c.product_id,
+        or_(Product.rating_sum != totals.c.rating_sum,
+            Product.rating_count != totals.c.rating_count),
+    ).values(
+        rating_sum=totals.c.rating_sum,
+        rating_count=totals.c.rating_count,
+        rating=(cast(totals.c.rating_sum, Float)
+                / func.nullif(totals.c.rating_count, 0)),
+    ).returning(Product.id, Product.rating,
+                Product.rating_count).cte("changed")
+    listed = listing_update(changed, "rating", "rating_count").returning(
+        ProductListing.id).cte("listed")
+    updated = await db.scalar(
+        select(func.count()).select_from(changed).add_cte(listed))
     await db.commit()
+    return updated
 
 
-async def check_review_exists(db: AsyncDBSession, user_id: int, product_id: int) -> None:
-    """Предотвращает добавление нескольких отзывов к товару."""
-    review_exists = await db.scalar(select(Review).where(
-        Review.user_id == user_id, Review.product_id == product_id
-    ))
-    if review_exists:
+async def insert_review_or_error(
+        db: AsyncDBSession, user_id: int, review: ReviewCreate) -> Review:
+    """
+    Добавляет отзыв одним INSERT ... SELECT ... ON CONFLICT DO NOTHING:
+    строка вставляется, только если товар активен и пользователь
+    ещё не оставлял отзыв к нему.
+    """
+    product_is_active = select(Product.id).where(
+        Product.id == review.product_id, Product.is_active).exists()
+    review_db = await db.scalar(
+        insert(Review).from_select(
+            ["user_id", "product_id", "comment", "grade"],
+            select(literal(user_id), literal(review.product_id),
+                   literal(review.comment), literal(review.grade))
+            .where(product_is_active),
+        )
+        .on_conflict_do_nothing(index_elements=["user_id", "product_id"])
+        .returning(Review)
+    )
+    if review_db is None:
+        await get_product_or_404(db, review.product_id)
         raise ReviewAlreadyExists
+    return review_db
 
 
-async def get_review_or_404(db: AsyncDBSession, review_id: int) -> Review:
-    """Проверка, существует ли отзыв."""
-    review = await db.scalar(select(Review).where(
-        Review.id == review_id))
+async def deactivate_review_or_404(db: AsyncDBSession, review_id: int) -> Review:
+    """Мягко удаляет активный отзыв одним UPDATE ... RETURNING."""
+    review = await db.scalar(update(Review).where(
+        Review.id == review_id, Review.is_active
+    ).values(is_active=False).returning(Review))
     if review is None:
         raise ReviewNotFoundError
     return review
+
+
+async def reserve_stock(db: AsyncDBSession,
+                        quantities: dict[int, int]) -> dict[int, float]:
+    """
+    Списывает остатки всех позиций заказа одним
+    UPDATE ... SET stock = stock - n WHERE stock >= n RETURNING.
+    Строки товаров предварительно блокируются в порядке id, чтобы
+    встречные заказы с несколькими позициями не взаимоблокировались.
+    Если хотя бы одной позиции не хватает, транзакция откатывается.
+    Возвращает цены товаров по их ID.
+    """
+    items = values(
+        column("product_id", Integer), column("quantity", Integer),
+        name="items",
+    ).data(list(quantities.items()))
+    locked = (
+        select(Product.id).where(Product.id.in_(quantities))
+        .order_by(Product.id).with_for_update()
+        .cte("locked").prefix_with("MATERIALIZED")
+    )
+    reserved = (
+        update(Product).where(
+            Product.id == items.c.product_id,
+            Product.id.in_(select(locked.c.id)),
+            Product.is_active,
+            Product.stock >= items.c.quantity,
+        ).values(stock=Product.stock - items.c.quantity)
+        .returning(Product.id, Product.price, Product.stock).cte("reserved")
+    )
+    listed = listing_update(reserved, "stock").returning(
+        ProductListing.id).cte("listed")
+    rows = (await db.execute(
+        select(reserved.c.id, reserved.c.price).add_cte(listed))).all()
+    if len(rows) != len(quantities):
+        await db.rollback()
+        raise InsufficientStockError
+    return {product_id: price for product_id, price in rows}
+
+
+async def release_reserved_orders(db: AsyncDBSession, status: str,
+                                  *conditions) -> int:
+    """
+    Переводит подходящие под conditions резервы в status и возвращает
+    их товары на склад одним запросом. Коммит выполняет вызывающий код.
+    Возвращает число освобождённых заказов.
+    """
+    released = (
+        update(Order).where(Order.status == "reserved", *conditions)
+        .values(status=status).returning(Order.id).cte("released")
+    )
+    returned = (
+        select(OrderItem.product_id,
+               func.sum(OrderItem.quantity).label("quantity"))
+        .join(released, OrderItem.order_id == released.c.id)
+        .group_by(OrderItem.product_id).cte("returned")
+    )
+    restocked = (
+        update(Product).where(Product.id == returned.c.product_id)
+        .values(stock=Product.stock + returned.c.quantity)
+        .returning(Product.id, Product.stock).cte("restocked")
+    )
+    listed = listing_update(restocked, "stock").returning(
+        ProductListing.id).cte("listed")
+    return await db.scalar(
+        select(func.count()).select_from(released).add_cte(restocked, listed))
+
+
+# Колонки витрины в порядке выборки sync_product_listings.
+LISTING_COLUMNS = ["id", "name", "sku", "description", "price", "image_url",
+                   "stock", "rating", "rating_count", "category_id",
+                   "category_path", "seller_id", "is_active"]
+
+
+def category_paths() -> CTE:
+    """
+    Рекурсивный CTE с путём ID от корня до каждой категории и флагом
+    active: активны ли все категории пути. Товары потомков
+    деактивированной категории скрываются вместе с её товарами.
+    Категории, замкнутые в цикл, в результат не попадают.
+    """
+    paths = select(
+        Category.id, array([Category.id]).label("path"),
+        Category.is_active.label("active"),
+    ).where(Category.parent_id.is_(None)).cte("category_paths", recursive=True)
+    return paths.union_all(
+        select(Category.id, func.array_append(paths.c.path, Category.id),
+               and_(paths.c.active, Category.is_active))
+        .join(paths, Category.parent_id == paths.c.id)
+        .where(Category.id != all_(paths.c.path))
+    )
+
+
+async def sync_product_listings(db: AsyncDBSession, *conditions) -> None:
+    """
+    Пересобирает строки витрины для товаров, подходящих под conditions,
+    одним INSERT ... SELECT ... ON CONFLICT DO UPDATE. Без условий
+    пересобирает всю витрину. Коммит выполняет вызывающий код.
+    """
+    paths = category_paths()
+    rows = (
+        select(Product.id, Product.name, Product.sku, Product.description,
+               Product.price, Product.image_url, Product.stock, Product.rating,
+               Product.rating_count, Product.category_id,
+               func.coalesce(paths.c.path, array([Product.category_id])),
+               Product.seller_id,
+               and_(Product.is_active,
+                    func.coalesce(paths.c.active, Category.is_active)))
+        .join(Category, Category.id == Product.category_id)
+        .outerjoin(paths, paths.c.id == Product.category_id)
+        .where(*conditions)
+    )
+    stmt = insert(ProductListing).from_select(LISTING_COLUMNS, rows)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={name: stmt.excluded[name] for name in LISTING_COLUMNS[1:]},
+    ))
+
+
+def listing_update(changed: CTE, *columns: str) -> Update:
+    """
+    UPDATE витрины из RETURNING изменившего товары DML CTE changed:
+    переносит колонки columns, не перечитывая товары.
+    """
+    return update(ProductListing).where(
+        ProductListing.id == changed.c.id).values(
+        {name: changed.c[name] for name in columns})
+
+
+async def sync_category_listings(db: AsyncDBSession, category_id: int) -> None:
+    """Пересобирает витрину товаров поддерева категории после её изменения."""
+    await sync_product_listings(db, Product.id.in_(
+        select(ProductListing.id).where(
+            ProductListing.category_path.contains([category_id]))))
+
+
+async def hide_category_listings(db: AsyncDBSession, category_id: int) -> None:
+    """
+    Скрывает из витрины товары деактивированной категории и всех её
+    потомков одним UPDATE.
+    """
+    await db.execute(update(ProductListing).where(
+        ProductListing.category_path.contains([category_id]),
+        ProductListing.is_active,
+    ).values(is_active=False))
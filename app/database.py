@@ -1,13 +1,110 @@
+import time
+from uuid import uuid4
+
+from sqlalchemy import event
+from sqlalchemy.engine.default import CacheStats
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+from app.config import config
+from app.metrics import (
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_OVERFLOW,
+    DB_POOL_WAIT_SECONDS,
+    record_query,
+)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, измеряющий время ожидания свободного соединения."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - started)
 
-DATABASE_URL = "postgresql+asyncpg://ecommerce_user:12345678@db:5432/ecommerce_db"
 
-async_engine = create_async_engine(url=DATABASE_URL, echo=True)
+def engine_options() -> dict:
+    """Параметры create_async_engine из настроек приложения."""
+    if config.DB_PGBOUNCER:
+        return {
+            "poolclass": NullPool,
+            "connect_args": {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            },
+        }
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+        "connect_args": {
+            "prepared_statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+        },
+    }
+
+
+async_engine = create_async_engine(url=config.DATABASE_URL, echo=config.DB_ECHO,
+                                   **engine_options())
+# Движки реплик для чтения, см. app.replicas.
+replica_engines = [
+    create_async_engine(url=url.strip(), echo=config.DB_ECHO, **engine_options())
+    for url in config.DB_REPLICA_URLS.split(",") if url.strip()
+]
 
 async_session_maker = async_sessionmaker(bind=async_engine, expire_on_commit=False,
                                          class_=AsyncSession)
 
 
+def set_pool_gauges(checked_out: int, overflow: int) -> None:
+    DB_POOL_CHECKED_OUT.set(checked_out)
+    DB_POOL_OVERFLOW.set(max(overflow, 0))
+
+
+@event.listens_for(async_engine.sync_engine, "checkout")
+def pool_checkout(*args):
+    """Обновляет метрики пула при выдаче соединения."""
+    pool = async_engine.sync_engine.pool
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        set_pool_gauges(pool.checkedout(), pool.overflow())
+
+
+@event.listens_for(async_engine.sync_engine, "checkin")
+def pool_checkin(*args):
+    """
+    Обновляет метрики пула при возврате соединения. Событие приходит
+    до того, как пул примет соединение, поэтому оно ещё считается
+    выданным. Если все остальные соединения свободны, пул закроет
+    возвращаемое соединение сверх pool_size, и overflow уменьшится.
+    """
+    pool = async_engine.sync_engine.pool
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        checked_out = pool.checkedout() - 1
+        set_pool_gauges(checked_out, min(pool.overflow(), checked_out))
+
+
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    """Передаёт длительность запроса и попадание в кэш компиляции в метрики."""
+    cache_result = context.cache_hit if context is not None else CacheStats.NO_CACHE_KEY
+    record_query(time.perf_counter() - conn.info["query_started"].pop(),
+                 cache_result.name.lower())
+
+
+for engine in (async_engine, *replica_engines):
+    event.listen(engine.sync_engine, "before_cursor_execute", start_query_timer)
+    event.listen(engine.sync_engine, "after_cursor_execute", stop_query_timer)
+
+
 class Base(DeclarativeBase):
     pass
@@ -1,13 +1,32 @@
 from collections.abc import AsyncGenerator
 
+from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import async_session_maker
+from app.replicas import recent_writers, replicas
 
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
 
-async def get_async_db() -> AsyncGenerator[AsyncSession]:
+
+async def get_async_db(request: Request) -> AsyncGenerator[AsyncSession]:
     """
     Предоставляет асинхронную сессию SQLAlchemy для работы с базой данных PostgreSQL.
     """
+    authorization = request.headers.get("authorization")
+    if replicas.engines and authorization and request.method not in SAFE_METHODS:
+        await recent_writers.mark(authorization)
     async with async_session_maker() as session:
         yield session
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession]:
+    """
+    Сессия для обработчиков только для чтения: на реплике, если они
+    настроены, или на основной БД сразу после записи этого же клиента.
+    """
+    authorization = request.headers.get("authorization")
+    primary = (bool(replicas.engines) and bool(authorization)
+               and await recent_writers.contains(authorization))
+    async with replicas.session(primary=primary) as session:
+        yield session
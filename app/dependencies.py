@@ -4,10 +4,13 @@ from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db_depends import get_async_db
+from app.db_depends import get_async_db, get_read_db
+from app.loaders import EntityLoader, get_loader
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/token")
 
 AsyncDBSession = Annotated[AsyncSession, Depends(get_async_db)]
+AsyncReadDBSession = Annotated[AsyncSession, Depends(get_read_db)]
+Loader = Annotated[EntityLoader, Depends(get_loader)]
 Token = Annotated[str, Depends(oauth2_scheme)]
 FormData = Annotated[OAuth2PasswordRequestForm, Depends()]
@@ -30,6 +30,32 @@ ReviewAlreadyExists = HTTPException(
     status_code=status.HTTP_403_FORBIDDEN,
     detail="You can only create one review per product"
 )
+UnsupportedImportFormatError = HTTPException(
+    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+    detail="Use text/csv or application/x-ndjson"
+)
+InvalidCursorError = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor"
+)
+OrderNotFound = HTTPException(
+    status_code=status.HTTP_404_NOT_FOUND, detail="Order not found"
+)
+InsufficientStockError = HTTPException(
+    status_code=status.HTTP_409_CONFLICT,
+    detail="Not enough stock for one or more products"
+)
+OrderNotReservedError = HTTPException(
+    status_code=status.HTTP_409_CONFLICT,
+    detail="Order is not reserved or its reservation has expired"
+)
+
+
+def invalid_expand(allowed: list[str]) -> HTTPException:
+    """400 для неизвестного имени в ?expand= со списком допустимых."""
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"expand accepts: {', '.join(allowed)}",
+    )
 
 
 # Исключения аутентификации.
@@ -53,6 +79,21 @@ RefreshTokenValidationError = HTTPException(
     detail="Could not validate refresh token",
     headers={"WWW-Authenticate": "Bearer"},
 )
+PasswordHasherBusyError = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Server is busy, try again later",
+    headers={"Retry-After": "1"},
+)
+
+
+def rate_limit_exceeded(retry_after: int) -> HTTPException:
+    """429 с числом секунд, через которое запрос будет принят."""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many requests",
+        headers={"Retry-After": str(retry_after)},
+    )
+
 
 # Исключения авторизации
 AuthorizationError = HTTPException(
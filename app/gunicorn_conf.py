@@ -0,0 +1,24 @@
+"""
+Настройки gunicorn для production:
+
+    gunicorn app.main:app --config python:app.gunicorn_conf ...
+
+Хуки готовят каталог PROMETHEUS_MULTIPROC_DIR, в котором воркеры
+хранят метрики, и удаляют метрики завершившихся воркеров.
+"""
+import os
+import shutil
+
+from prometheus_client import multiprocess
+
+
+def on_starting(server):
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+
+def child_exit(server, worker):
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(worker.pid)
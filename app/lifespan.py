@@ -0,0 +1,125 @@
+"""
+Модуль с запуском и остановкой воркера.
+
+При запуске воркер заранее открывает DB_POOL_WARMUP соединений пула
+основной БД и каждой реплики, выполняет на них запросы
+app.statements.HOT_STATEMENTS (SQLAlchemy кэширует их компиляцию,
+asyncpg — prepared statements соединения), настраивает мапперы,
+загружает кэш категорий и подписывается на отзывы токенов
+(app.auth.RevocationListener). Ошибка прогрева не мешает запуску:
+первые запросы просто откроют соединения сами. Время запуска пишется
+в лог и в метрику app_startup_seconds.
+
+При остановке воркер перестаёт считаться готовым, дожидается фоновых
+задач, отписывается от отзывов токенов, закрывает соединения пулов
+и пул bcrypt и сбрасывает очередь логов loguru.
+"""
+import asyncio
+import time
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import configure_mappers
+from sqlalchemy.pool import NullPool
+
+from app.auth import password_hasher, revocation_listener
+from app.category_cache import category_cache
+from app.config import config
+from app.database import async_engine, async_session_maker, replica_engines
+from app.metrics import APP_STARTUP_SECONDS
+from app.replicas import CONNECT_ERRORS, drain_background_tasks
+from app.statements import HOT_STATEMENTS
+
+
+class WorkerState:
+    """Состояние воркера для проб /health/live и /health/ready."""
+
+    def __init__(self):
+        self.started = False
+        self.stopping = False
+        self.startup_seconds: float | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.started and not self.stopping
+
+
+worker_state = WorkerState()
+
+
+async def warm_up_engine(engine: AsyncEngine, connections: int) -> None:
+    """Открывает соединения пула одновременно и прогревает на них запросы."""
+    if isinstance(engine.sync_engine.pool, NullPool):
+        connections = 1
+
+    async def warm_up_connection():
+        async with engine.connect() as conn:
+            for stmt, params in HOT_STATEMENTS.values():
+                await conn.execute(stmt, params)
+
+    results = await asyncio.gather(
+        *(warm_up_connection() for _ in range(connections)),
+        return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+async def start_worker() -> None:
+    started = time.perf_counter()
+    configure_mappers()
+    revocation_listener.start()
+    connections = min(config.DB_POOL_WARMUP, config.DB_POOL_SIZE)
+    # Каждый движок прогревается независимо: недоступная реплика
+    # не мешает прогреву основной БД и загрузке кэша категорий.
+    engines = (async_engine, *replica_engines)
+    results = await asyncio.gather(
+        *(warm_up_engine(engine, connections) for engine in engines),
+        return_exceptions=True)
+    for engine, result in zip(engines, results, strict=True):
+        if isinstance(result, CONNECT_ERRORS):
+            logger.warning(
+                f"Database warm-up failed for {engine.url.host}: {result}")
+        elif isinstance(result, BaseException):
+            raise result
+    try:
+        async with async_session_maker() as session:
+            await category_cache.snapshot(session)
+    except CONNECT_ERRORS as exc:
+        logger.warning(f"Category cache warm-up failed: {exc}")
+    worker_state.startup_seconds = time.perf_counter() - started
+    worker_state.started = True
+    APP_STARTUP_SECONDS.set(worker_state.startup_seconds)
+    logger.info(f"Worker started in {worker_state.startup_seconds:.3f}s")
+
+
+async def stop_worker() -> None:
+    worker_state.stopping = True
+    await drain_background_tasks(config.SHUTDOWN_TIMEOUT)
+    await revocation_listener.stop()
+    await asyncio.gather(*(engine.dispose()
+                           for engine in (async_engine, *replica_engines)))
+    password_hasher.shutdown()
+    logger.info("Worker stopped")
+    await logger.complete()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
+    await start_worker()
+    yield
+    await stop_worker()
+
+
+async def database_available(timeout: float) -> bool:
+    """Проверяет, что основная БД отвечает на SELECT 1 за timeout секунд."""
+    try:
+        async with asyncio.timeout(timeout), async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except CONNECT_ERRORS:
+        return False
+    return True
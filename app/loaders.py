@@ -0,0 +1,124 @@
+"""
+Модуль пакетной загрузки связанных сущностей в рамках одного запроса.
+
+EntityLoader копит запросы load(model, id), сделанные в одном проходе
+event loop, и выполняет их одним SELECT ... WHERE id = ANY(:ids) на
+модель. Загруженные сущности запоминаются до конца HTTP-запроса:
+повторный load того же ID не обращается к БД. Отсутствующий ID даёт
+None, как и ID неактивной сущности у моделей с is_active: встроенные
+объекты не должны показывать то, что по прямому адресу отдаёт 404.
+
+Загрузчик создаётся на запрос зависимостью get_loader поверх сессии
+чтения. Запросы загрузчика выполняются в этой же сессии, поэтому
+обработчик не должен одновременно с ожиданием загрузки выполнять
+в ней другие запросы.
+
+Зависимость Expand разбирает параметр ?expand=category,seller
+в множество имён связанных объектов, которые нужно встроить в ответ.
+"""
+import asyncio
+from collections.abc import Hashable, Iterable
+from functools import cache
+from typing import Annotated, Any
+
+from fastapi import Depends, Query
+from sqlalchemy import Integer, Select, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db_depends import get_read_db
+from app.exceptions import invalid_expand
+
+
+@cache
+def by_ids_statement(model: type) -> Select:
+    """SELECT активных объектов модели по списку ID, один на модель."""
+    stmt = select(model).where(
+        model.id == any_(bindparam("ids", type_=ARRAY(Integer))))
+    if hasattr(model, "is_active"):
+        stmt = stmt.where(model.is_active)
+    return stmt
+
+
+class EntityLoader:
+    """Загрузчик сущностей по ID с пакетированием и кэшем на запрос."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._results: dict[tuple[type, Hashable], asyncio.Future] = {}
+        self._queue: dict[type, dict[Hashable, asyncio.Future]] = {}
+        self._dispatch: asyncio.Task | None = None
+        self._tasks: set[asyncio.Task] = set()
+        # Пачки, поставленные во время выполнения предыдущей, ждут её:
+        # сессия не допускает одновременных запросов.
+        self._lock = asyncio.Lock()
+
+    async def load(self, model: type, entity_id: Hashable) -> Any | None:
+        """Сущность model по ID или None, если её нет."""
+        key = (model, entity_id)
+        future = self._results.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._results[key] = future
+            self._queue.setdefault(model, {})[entity_id] = future
+            if self._dispatch is None:
+                # Запросы выполняются после того, как все корутины,
+                # готовые в текущем проходе event loop, поставят свои ID.
+                self._dispatch = asyncio.create_task(self._run_queue())
+                self._tasks.add(self._dispatch)
+                self._dispatch.add_done_callback(self._tasks.discard)
+        return await asyncio.shield(future)
+
+    async def load_many(self, model: type,
+                        ids: Iterable[Hashable]) -> list[Any | None]:
+        """Сущности в порядке ids, None на месте отсутствующих."""
+        return await asyncio.gather(
+            *(self.load(model, entity_id) for entity_id in ids))
+
+    async def _run_queue(self) -> None:
+        await asyncio.sleep(0)
+        queue, self._queue, self._dispatch = self._queue, {}, None
+        async with self._lock:
+            for model, futures in queue.items():
+                await self._load_batch(model, futures)
+
+    async def _load_batch(self, model: type,
+                          futures: dict[Hashable, asyncio.Future]) -> None:
+        try:
+            entities = await self.db.scalars(by_ids_statement(model),
+                                             {"ids": list(futures)})
+            found = {entity.id: entity for entity in entities}
+        except Exception as exc:
+            # Неудачные ID не запоминаются: следующий load повторит запрос.
+            for entity_id, future in futures.items():
+                del self._results[(model, entity_id)]
+                future.set_exception(exc)
+            return
+        for entity_id, future in futures.items():
+            future.set_result(found.get(entity_id))
+
+
+def get_loader(
+        db: Annotated[AsyncSession, Depends(get_read_db)]) -> EntityLoader:
+    """Загрузчик текущего запроса. FastAPI создаёт его один раз на запрос."""
+    return EntityLoader(db)
+
+
+class Expand:
+    """Зависимость: разбирает ?expand=a,b и проверяет допустимые имена."""
+
+    def __init__(self, *allowed: str):
+        self.allowed = frozenset(allowed)
+
+    def __call__(
+            self,
+            expand: Annotated[str | None, Query(
+                description="Связанные объекты через запятую")] = None,
+    ) -> frozenset[str]:
+        if not expand:
+            return frozenset()
+        names = frozenset(name.strip() for name in expand.split(",")
+                          if name.strip())
+        if not names <= self.allowed:
+            raise invalid_expand(sorted(self.allowed))
+        return names
@@ -1,29 +1,132 @@
+"""
+Модуль с настройкой логирования и access-логом запросов.
+
+Каждая строка info.log — JSON-объект. Запросы логируются чистым ASGI
+middleware: успешные ответы можно сэмплировать (LOG_SUCCESS_SAMPLE_RATE),
+ошибки клиента и сервера логируются всегда.
+"""
+import json
+import random
+import time
+import traceback
 from uuid import uuid4
 
-from fastapi import Request
-from fastapi.responses import JSONResponse
 from loguru import logger
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import config
+
+REQUEST_ID_HEADER = b"x-request-id"
+MAX_REQUEST_ID_LENGTH = 128
+
+SERVER_ERROR_BODY = b'{"success":false}'
+
+
+def json_format(record) -> str:
+    """Форматирует запись loguru как одну строку JSON."""
+    extra = record["extra"]
+    entry = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "message": record["message"],
+        **{key: value for key, value in extra.items() if key != "_json"},
+    }
+    if record["exception"] is not None:
+        error = record["exception"]
+        entry["exception"] = "".join(traceback.format_exception(
+            error.type, error.value, error.traceback))
+    extra["_json"] = json.dumps(entry, ensure_ascii=False, default=str)
+    return "{extra[_json]}\n"
+
 
 logger.add(
     "info.log",
-    format="Log: [{extra[log_id]}:{time} - {level} - {message}]",
+    format=json_format,
     level="INFO",
     enqueue=True,
 )
 
 
-class LogMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        log_id = str(uuid4())
-        with logger.contextualize(log_id=log_id):
+def get_request_id(scope: Scope) -> str:
+    """Берёт X-Request-ID из запроса или создаёт новый, если его нет."""
+    for name, value in scope["headers"]:
+        if name == REQUEST_ID_HEADER:
+            if 0 < len(value) <= MAX_REQUEST_ID_LENGTH:
+                return value.decode("latin-1")
+            break
+    return uuid4().hex
+
+
+class LogMiddleware:
+    """
+    ASGI middleware, пишущее access-лог и передающее X-Request-ID
+    в ответ и в контекст логгера обработчика.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = get_request_id(scope)
+        status_code = 500
+        response_bytes = 0
+        response_started = False
+
+        async def send_with_request_id(message: Message):
+            nonlocal status_code, response_bytes, response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (REQUEST_ID_HEADER, request_id.encode("latin-1")),
+                ]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        started = time.perf_counter()
+        with logger.contextualize(request_id=request_id):
             try:
-                response = await call_next(request)
-                if response.status_code in [401, 402, 403, 404]:
-                    logger.warning(f"Request to {request.url.path} failed")
-                else:
-                    logger.info("Successfully accessed " + request.url.path)
-            except Exception as exc:
-                logger.error(f"Request to {request.url.path} failed: {exc}")
-                response = JSONResponse(content={"success": False}, status_code=500)
-            return response
+                await self.app(scope, receive, send_with_request_id)
+            except Exception:
+                status_code = 500
+                logger.exception("Unhandled error")
+                if response_started:
+                    # Заголовки уже отправлены: сервер должен оборвать
+                    # соединение, иначе клиент примет усечённое тело
+                    # за полный ответ.
+                    raise
+                await send_with_request_id({
+                    "type": "http.response.start",
+                    "status": 500,
+                    "headers": [(b"content-type", b"application/json")],
+                })
+                await send_with_request_id({
+                    "type": "http.response.body", "body": SERVER_ERROR_BODY,
+                })
+            finally:
+                self.log_request(scope, status_code, response_bytes,
+                                 time.perf_counter() - started)
+
+    @staticmethod
+    def log_request(scope: Scope, status_code: int, response_bytes: int,
+                    duration: float) -> None:
+        if (status_code < 400
+                and random.random() >= config.LOG_SUCCESS_SAMPLE_RATE):
+            return
+        route = scope.get("route")
+        level = ("ERROR" if status_code >= 500
+                 else "WARNING" if status_code >= 400 else "INFO")
+        logger.bind(
+            method=scope["method"],
+            path=scope["path"],
+            route=route.path if route is not None else None,
+            status=status_code,
+            duration_ms=round(duration * 1000, 3),
+            response_bytes=response_bytes,
+        ).log(level, "request")
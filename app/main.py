@@ -1,18 +1,26 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST
 
+from app.lifespan import lifespan
 from app.log import LogMiddleware
-from app.routers import categories, products, reviews, users
+from app.metrics import MetricsMiddleware, render_metrics
+from app.response_cache import ResponseCacheMiddleware
+from app.routers import categories, health, orders, products, reviews, users
 from app.tasks import call_background_task
 
 app = FastAPI(
-    title="FastAPI интернет-магазин", version="0.1.0"
+    title="FastAPI интернет-магазин", version="0.1.0", lifespan=lifespan
 )
+app.add_middleware(ResponseCacheMiddleware)
 app.add_middleware(LogMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(categories.router)
 app.include_router(products.router)
 app.include_router(users.router)
 app.include_router(reviews.router)
+app.include_router(orders.router)
+app.include_router(health.router)
 
 
 @app.get("/")
@@ -20,3 +28,9 @@ async def root(message: str):
     """Корневой маршрут, подтверждающий, что API работает."""
     call_background_task.apply_async(args=[message], countdown=6)
     return {"message": "API интернет магазина"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Метрики приложения в формате Prometheus."""
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
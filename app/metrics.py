@@ -0,0 +1,190 @@
+"""
+Модуль с метриками Prometheus.
+
+При запуске под gunicorn каждый воркер пишет метрики в файлы каталога
+PROMETHEUS_MULTIPROC_DIR, а эндпоинт /metrics собирает их вместе
+(см. app/gunicorn_conf.py).
+"""
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Метрики HTTP-запросов. path — шаблон маршрута, а не фактический URL,
+# чтобы число временных рядов не зависело от ID в путях.
+HTTP_REQUESTS = Counter(
+    "http_requests",
+    "HTTP requests by route and status code",
+    ["method", "path", "status"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_seconds",
+    "HTTP request latency by route",
+    ["method", "path"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being processed",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+# Метрики запросов к БД.
+DB_QUERY_SECONDS = Histogram(
+    "db_query_seconds",
+    "Duration of a single database query",
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "Number of database queries made while handling one HTTP request",
+    ["method", "path"],
+    buckets=(0, 1, 2, 3, 4, 5, 7, 10, 15, 20, 50, 100),
+)
+DB_SECONDS_PER_REQUEST = Histogram(
+    "db_seconds_per_request",
+    "Total database query time while handling one HTTP request",
+    ["method", "path"],
+)
+# Результат поиска запроса в кэше компиляции SQLAlchemy:
+# cache_hit, cache_miss, caching_disabled, no_cache_key, no_dialect_support.
+DB_COMPILED_CACHE = Counter(
+    "db_compiled_cache",
+    "Statement executions by SQLAlchemy compiled cache lookup result",
+    ["result"],
+)
+
+# Метрики пула хэширования паролей.
+PASSWORD_HASH_QUEUE_SECONDS = Histogram(
+    "password_hash_queue_seconds",
+    "Time a password hashing job waits for a free worker thread",
+    ["operation"],
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds",
+    "Time spent hashing or verifying a password",
+    ["operation"],
+)
+PASSWORD_HASH_PENDING = Gauge(
+    "password_hash_pending",
+    "Password hashing jobs queued or running",
+    multiprocess_mode="livesum",
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected",
+    "Password hashing jobs rejected because the queue was full",
+    ["operation"],
+)
+
+# Метрики пула соединений с БД.
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Database connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Database connections opened above pool_size",
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a database connection from the pool",
+)
+
+# Время запуска воркера, см. app.lifespan.
+APP_STARTUP_SECONDS = Gauge(
+    "app_startup_seconds",
+    "Time from worker startup to readiness, including database warm-up",
+    multiprocess_mode="max",
+)
+
+# Метрики ограничения частоты запросов.
+RATE_LIMITED = Counter(
+    "rate_limited_requests",
+    "Requests rejected with 429 by rate limit name",
+    ["limit"],
+)
+
+
+@dataclass
+class QueryStats:
+    """Счётчики запросов к БД в рамках одного HTTP-запроса."""
+
+    count: int = 0
+    seconds: float = 0.0
+
+
+request_query_stats: ContextVar[QueryStats | None] = ContextVar(
+    "request_query_stats", default=None)
+
+
+def record_query(seconds: float, cache_result: str) -> None:
+    """Учитывает выполненный запрос к БД. Вызывается из событий SQLAlchemy."""
+    DB_QUERY_SECONDS.observe(seconds)
+    DB_COMPILED_CACHE.labels(cache_result).inc()
+    stats = request_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += seconds
+
+
+def render_metrics() -> bytes:
+    """Метрики в текстовом формате Prometheus, с учётом всех воркеров."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware, собирающее число, длительность и количество
+    запросов к БД для каждого маршрута.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = QueryStats()
+        token = request_query_stats.set(stats)
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - started
+            in_progress.dec()
+            request_query_stats.reset(token)
+            # Маршрут записывается в scope роутером после сопоставления пути.
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            HTTP_REQUESTS.labels(method, path, str(status_code)).inc()
+            HTTP_REQUEST_SECONDS.labels(method, path).observe(duration)
+            DB_QUERIES_PER_REQUEST.labels(method, path).observe(stats.count)
+            DB_SECONDS_PER_REQUEST.labels(method, path).observe(stats.seconds)
@@ -7,6 +7,7 @@ from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from app import models
+from app.config import config as app_config
 from app.database import Base
 
 # this is the Alembic Config object, which provides
@@ -18,6 +19,10 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# URL базы данных берётся из настроек приложения, а не из alembic.ini.
+config.set_main_option("sqlalchemy.url",
+                        app_config.DATABASE_URL.replace("%", "%%"))
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 # from myapp import mymodel
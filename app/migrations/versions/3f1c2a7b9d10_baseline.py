@@ -0,0 +1,157 @@
+"""baseline schema with query indexes
+
+Revision ID: 3f1c2a7b9d10
+Revises:
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# Выражение колонки поиска записано здесь, а не импортировано из моделей:
+# ревизия не должна меняться вместе с текущим кодом приложения.
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7b9d10'
+down_revision: str | Sequence[str] | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Триграммный индекс по названию товара.
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('role', sa.String(), nullable=False),
+        sa.Column('token_version', sa.Integer(), server_default='0',
+                  nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table(
+        'categories',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('parent_id', sa.Integer(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(['parent_id'], ['categories.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_categories_parent_id', 'categories', ['parent_id'])
+
+    op.create_table(
+        'products',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('sku', sa.String(length=64), nullable=True),
+        sa.Column('description', sa.String(length=500), nullable=True),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('image_url', sa.String(length=200), nullable=True),
+        sa.Column('stock', sa.Integer(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('rating', sa.Float(), nullable=True),
+        sa.Column('rating_sum', sa.Integer(), server_default='0',
+                  nullable=False),
+        sa.Column('rating_count', sa.Integer(), server_default='0',
+                  nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('seller_id', sa.Integer(), nullable=False),
+        sa.Column('search_vector', postgresql.TSVECTOR(),
+                  sa.Computed(SEARCH_VECTOR, persisted=True), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id']),
+        sa.ForeignKeyConstraint(['seller_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('seller_id', 'sku', name='uq_products_seller_sku'),
+    )
+    # Keyset-пагинация списка товаров по каждому порядку сортировки
+    # и фильтры по категории и продавцу.
+    op.create_index('ix_products_active_price_id', 'products', ['price', 'id'],
+                    postgresql_where=sa.text('is_active'))
+    op.create_index('ix_products_active_rating_id', 'products',
+                    [sa.text('coalesce(rating, 0)'), 'id'],
+                    postgresql_where=sa.text('is_active'))
+    op.create_index('ix_products_active_category_id', 'products',
+                    ['category_id', 'id'],
+                    postgresql_where=sa.text('is_active'))
+    op.create_index('ix_products_active_seller_id', 'products',
+                    ['seller_id', 'id'], postgresql_where=sa.text('is_active'))
+    # Полнотекстовый и нечёткий поиск.
+    op.create_index('ix_products_search_vector', 'products', ['search_vector'],
+                    postgresql_using='gin')
+    op.create_index('ix_products_name_trgm', 'products', ['name'],
+                    postgresql_using='gin',
+                    postgresql_ops={'name': 'gin_trgm_ops'})
+
+    op.create_table(
+        'reviews',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('comment', sa.Text(), nullable=True),
+        sa.Column('comment_date', sa.DateTime(), nullable=False),
+        sa.Column('grade', sa.Integer(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'product_id',
+                            name='uq_reviews_user_product'),
+    )
+    op.create_index('ix_reviews_active_product_id', 'reviews',
+                    ['product_id', 'id'],
+                    postgresql_where=sa.text('is_active'))
+
+    op.create_table(
+        'orders',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_orders_user_id', 'orders', ['user_id'])
+    op.create_index('ix_orders_reserved_expires_at', 'orders', ['expires_at'],
+                    postgresql_where=sa.text("status = 'reserved'"))
+
+    op.create_table(
+        'order_items',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('unit_price', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id']),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('order_items')
+    op.drop_table('orders')
+    op.drop_table('reviews')
+    op.drop_table('products')
+    op.drop_table('categories')
+    op.drop_table('users')
@@ -0,0 +1,130 @@
+"""product_listings read model
+
+Revision ID: 8b2d4e6f1a35
+Revises: 3f1c2a7b9d10
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# Выражение колонки поиска на момент ревизии: название важнее описания.
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2d4e6f1a35'
+down_revision: str | Sequence[str] | None = '3f1c2a7b9d10'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'product_listings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('sku', sa.String(length=64), nullable=True),
+        sa.Column('description', sa.String(length=500), nullable=True),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('image_url', sa.String(length=200), nullable=True),
+        sa.Column('stock', sa.Integer(), nullable=False),
+        sa.Column('in_stock', sa.Boolean(),
+                  sa.Computed('stock > 0', persisted=True), nullable=False),
+        sa.Column('rating', sa.Float(), nullable=True),
+        sa.Column('rating_count', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('category_path', postgresql.ARRAY(sa.Integer()),
+                  nullable=False),
+        sa.Column('seller_id', sa.Integer(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('search_vector', postgresql.TSVECTOR(),
+                  sa.Computed(SEARCH_VECTOR, persisted=True), nullable=False),
+        sa.ForeignKeyConstraint(['id'], ['products.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    # Заполнение витрины из текущих товаров до создания индексов.
+    op.execute("""
+        WITH RECURSIVE category_paths(id, path, active) AS (
+            SELECT id, ARRAY[id], is_active
+            FROM categories WHERE parent_id IS NULL
+            UNION ALL
+            SELECT categories.id,
+                   array_append(category_paths.path, categories.id),
+                   category_paths.active AND categories.is_active
+            FROM categories JOIN category_paths
+                ON categories.parent_id = category_paths.id
+            WHERE categories.id <> ALL(category_paths.path)
+        )
+        INSERT INTO product_listings (
+            id, name, sku, description, price, image_url, stock, rating,
+            rating_count, category_id, category_path, seller_id, is_active)
+        SELECT products.id, products.name, products.sku, products.description,
+               products.price, products.image_url, products.stock,
+               products.rating, products.rating_count, products.category_id,
+               coalesce(category_paths.path, ARRAY[products.category_id]),
+               products.seller_id,
+               products.is_active
+               AND coalesce(category_paths.active, categories.is_active)
+        FROM products
+        JOIN categories ON categories.id = products.category_id
+        LEFT JOIN category_paths ON category_paths.id = products.category_id
+    """)
+
+    op.create_index('ix_product_listings_active_price_id',
+                    'product_listings', ['price', 'id'],
+                    postgresql_where=sa.text('is_active'))
+    op.create_index('ix_product_listings_active_rating_id',
+                    'product_listings',
+                    [sa.text('coalesce(rating, 0)'), 'id'],
+                    postgresql_where=sa.text('is_active'))
+    op.create_index('ix_product_listings_active_category_id',
+                    'product_listings', ['category_id', 'id'],
+                    postgresql_where=sa.text('is_active'))
+    op.create_index('ix_product_listings_active_seller_id',
+                    'product_listings', ['seller_id', 'id'],
+                    postgresql_where=sa.text('is_active'))
+    op.create_index('ix_product_listings_category_path',
+                    'product_listings', ['category_path'],
+                    postgresql_using='gin')
+    op.create_index('ix_product_listings_search_vector',
+                    'product_listings', ['search_vector'],
+                    postgresql_using='gin')
+    op.create_index('ix_product_listings_name_trgm',
+                    'product_listings', ['name'],
+                    postgresql_using='gin',
+                    postgresql_ops={'name': 'gin_trgm_ops'})
+
+    # Список и поиск товаров перешли на витрину.
+    op.drop_index('ix_products_name_trgm', table_name='products')
+    op.drop_index('ix_products_search_vector', table_name='products')
+    op.drop_index('ix_products_active_rating_id', table_name='products')
+    op.drop_index('ix_products_active_price_id', table_name='products')
+    op.drop_column('products', 'search_vector')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('products', sa.Column(
+        'search_vector', postgresql.TSVECTOR(),
+        sa.Computed(SEARCH_VECTOR, persisted=True), nullable=False))
+    op.create_index('ix_products_active_price_id', 'products', ['price', 'id'],
+                    postgresql_where=sa.text('is_active'))
+    op.create_index('ix_products_active_rating_id', 'products',
+                    [sa.text('coalesce(rating, 0)'), 'id'],
+                    postgresql_where=sa.text('is_active'))
+    op.create_index('ix_products_search_vector', 'products', ['search_vector'],
+                    postgresql_using='gin')
+    op.create_index('ix_products_name_trgm', 'products', ['name'],
+                    postgresql_using='gin',
+                    postgresql_ops={'name': 'gin_trgm_ops'})
+    op.drop_table('product_listings')
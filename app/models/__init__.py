@@ -1,6 +1,9 @@
 from .categories import Category
+from .orders import Order, OrderItem
+from .product_listings import ProductListing
 from .products import Product
 from .reviews import Review
 from .users import User
 
-__all__ = ["Category", "Product", "User", "Review"]
+__all__ = ["Category", "Product", "User", "Review", "Order", "OrderItem",
+           "ProductListing"]
@@ -15,7 +15,7 @@ class Category(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(50), nullable=False)
     parent_id: Mapped[int] = mapped_column(ForeignKey("categories.id"),
-                                           nullable=True)
+                                           nullable=True, index=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     products: Mapped[list["Product"]] = relationship(
         "Product", back_populates="category"
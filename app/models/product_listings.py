@@ -0,0 +1,78 @@
+from sqlalchemy import (
+    Boolean,
+    Computed,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+# Конфигурации полнотекстового поиска и выражение сгенерированной
+# колонки поиска: название важнее описания.
+SEARCH_CONFIGS = ("russian", "english")
+SEARCH_VECTOR = " || ".join(
+    f"setweight(to_tsvector('{config}', coalesce({column}, '')), '{weight}')"
+    for column, weight in (("name", "A"), ("description", "B"))
+    for config in SEARCH_CONFIGS
+)
+
+
+class ProductListing(Base):
+    """
+    Витрина каталога: копия полей товара с путём категории, числом
+    отзывов и признаком видимости. Поддерживается в тех же транзакциях,
+    что меняют товары, категории и отзывы (app.crud), поэтому список
+    и поиск товаров читаются из одной таблицы без join.
+    """
+
+    __tablename__ = "product_listings"
+    # Частичные индексы под keyset-пагинацию и фильтры списка товаров:
+    # каждый порядок сортировки читается одним index scan.
+    __table_args__ = (
+        Index("ix_product_listings_active_price_id", "price", "id",
+              postgresql_where=text("is_active")),
+        Index("ix_product_listings_active_rating_id",
+              text("coalesce(rating, 0)"), "id",
+              postgresql_where=text("is_active")),
+        Index("ix_product_listings_active_category_id", "category_id", "id",
+              postgresql_where=text("is_active")),
+        Index("ix_product_listings_active_seller_id", "seller_id", "id",
+              postgresql_where=text("is_active")),
+        # Товары всего поддерева категории: category_path @> ARRAY[id].
+        Index("ix_product_listings_category_path", "category_path",
+              postgresql_using="gin"),
+        # Индексы поиска. Триграммный индекс требует расширения pg_trgm.
+        Index("ix_product_listings_search_vector", "search_vector",
+              postgresql_using="gin"),
+        Index("ix_product_listings_name_trgm", "name", postgresql_using="gin",
+              postgresql_ops={"name": "gin_trgm_ops"}),
+    )
+
+    id: Mapped[int] = mapped_column(
+        ForeignKey("products.id"), primary_key=True)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    sku: Mapped[str | None] = mapped_column(String(64))
+    description: Mapped[str | None] = mapped_column(String(500))
+    price: Mapped[float] = mapped_column(Float, nullable=False)
+    image_url: Mapped[str | None] = mapped_column(String(200))
+    stock: Mapped[int] = mapped_column(Integer, nullable=False)
+    in_stock: Mapped[bool] = mapped_column(
+        Boolean, Computed("stock > 0", persisted=True))
+    rating: Mapped[float | None] = mapped_column(Float)
+    rating_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    category_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # ID категорий от корня дерева до категории товара включительно.
+    category_path: Mapped[list[int]] = mapped_column(
+        ARRAY(Integer), nullable=False)
+    seller_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Товар активен и активны все категории на пути к его категории.
+    is_active: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR, Computed(SEARCH_VECTOR, persisted=True), deferred=True
+    )
@@ -1,6 +1,15 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Boolean, Float, ForeignKey, Integer, String
+from sqlalchemy import (
+    Boolean,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -12,15 +21,30 @@ if TYPE_CHECKING:
 
 class Product(Base):
     __tablename__ = "products"
+    # Список и поиск товаров читаются из витрины ProductListing,
+    # здесь остаются индексы для выборок товаров категории и продавца.
+    __table_args__ = (
+        # Ключ upsert при массовой загрузке. NULL в sku не конфликтуют.
+        UniqueConstraint("seller_id", "sku", name="uq_products_seller_sku"),
+        Index("ix_products_active_category_id", "category_id", "id",
+              postgresql_where=text("is_active")),
+        Index("ix_products_active_seller_id", "seller_id", "id",
+              postgresql_where=text("is_active")),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
+    sku: Mapped[str | None] = mapped_column(String(64))
     description: Mapped[str | None] = mapped_column(String(500))
     price: Mapped[float] = mapped_column(Float, nullable=False)
     image_url: Mapped[str | None] = mapped_column(String(200))
     stock: Mapped[int] = mapped_column(Integer, nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     rating: Mapped[float] = mapped_column(Float, nullable=True)
+    rating_sum: Mapped[int] = mapped_column(Integer, default=0, server_default="0",
+                                            nullable=False)
+    rating_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0",
+                                              nullable=False)
     category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"), nullable=False)
     seller_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
 
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, Text
+from sqlalchemy import ForeignKey, Index, Text, UniqueConstraint, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
@@ -8,6 +8,14 @@ from app.database import Base
 
 class Review(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # Один отзыв пользователя на товар, включая мягко удалённые.
+        # Индекс ограничения также обслуживает поиск по user_id.
+        UniqueConstraint("user_id", "product_id", name="uq_reviews_user_product"),
+        # Отзывы к товару и пересчёт его оценки.
+        Index("ix_reviews_active_product_id", "product_id", "id",
+              postgresql_where=text("is_active")),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
@@ -16,5 +16,8 @@ class User(Base):
     hashed_password: Mapped[str] = mapped_column(String, nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     role: Mapped[str] = mapped_column(String, default="buyer")
+    # Увеличение версии отзывает все ранее выданные токены пользователя.
+    token_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0",
+                                               nullable=False)
 
     products: Mapped[list["Product"]] = relationship("Product", back_populates="seller")
@@ -0,0 +1,50 @@
+"""
+Модуль для keyset-пагинации (пагинации по курсору).
+
+Курсор — непрозрачная для клиента строка, в которой закодированы
+значения ключа сортировки и id последней отданной записи. Следующая
+страница выбирается условием (sort_key, id) > (value, last_id), поэтому
+глубокие страницы стоят столько же, сколько первая.
+"""
+import base64
+import json
+from typing import Any
+
+from sqlalchemy import ColumnElement, tuple_
+
+from app.exceptions import InvalidCursorError
+
+
+def encode_cursor(*values: Any) -> str:
+    """Кодирует значения ключа последней записи в курсор."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[Any]:
+    """Декодирует курсор и проверяет количество значений ключа."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        raise InvalidCursorError from None
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError
+    if not all(isinstance(value, int | float) and not isinstance(value, bool)
+               for value in values):
+        raise InvalidCursorError
+    return values
+
+
+def keyset_clause(keys: list[ColumnElement], values: list[Any],
+                  descending: bool = False) -> ColumnElement[bool]:
+    """Условие выборки записей, идущих после курсора."""
+    if descending:
+        return tuple_(*keys) < tuple_(*values)
+    return tuple_(*keys) > tuple_(*values)
+
+
+def keyset_order(keys: list[ColumnElement],
+                 descending: bool = False) -> list[ColumnElement]:
+    """Порядок сортировки, согласованный с keyset_clause."""
+    return [key.desc() for key in keys] if descending else keys
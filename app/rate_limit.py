@@ -0,0 +1,158 @@
+"""
+Модуль ограничения частоты запросов (token bucket).
+
+Лимит записывается строкой "<число>/<период>", например "10/minute":
+корзина вмещает 10 токенов и пополняется со скоростью 10 токенов
+в минуту, каждый запрос забирает один токен. Запрос без токена получает
+429 с заголовком Retry-After.
+
+Лимиты задаются двумя способами:
+- на маршрут зависимостью RateLimit, ключ — IP клиента;
+- на роль в PermissionChecker (config.RATE_LIMIT_ROLES), ключ — id
+  пользователя, корзина общая для всех маршрутов этой роли.
+
+Без REDIS_URL корзины хранятся в памяти воркера и обновляются без
+блокировок: между чтением и записью состояния нет await. С REDIS_URL
+корзины общие для всех gunicorn-воркеров и обновляются атомарно
+Lua-скриптом. Если Redis недоступен, запрос пропускается.
+
+IP клиента берётся из request.client. За nginx uvicorn должен доверять
+X-Forwarded-For (FORWARDED_ALLOW_IPS, см. docker-compose.prod.yml),
+а nginx — заменять заголовок клиента своим $remote_addr, иначе лимит
+по IP обходится подставным X-Forwarded-For.
+"""
+import math
+import time
+from dataclasses import dataclass
+
+import redis.asyncio as redis
+from fastapi import Request
+from loguru import logger
+
+from app.cache import TTLCache
+from app.config import config
+from app.exceptions import rate_limit_exceeded
+from app.metrics import RATE_LIMITED
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(retry_after)
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class Limit:
+    """Ёмкость корзины и скорость её пополнения в токенах в секунду."""
+
+    burst: int
+    rate: float
+
+    @classmethod
+    def parse(cls, value: str) -> "Limit":
+        """Разбирает строку вида "10/minute"."""
+        count, _, period = value.partition("/")
+        if period not in PERIODS or not count.isdigit() or int(count) < 1:
+            raise ValueError(f"Invalid rate limit: {value!r}")
+        return cls(burst=int(count), rate=int(count) / PERIODS[period])
+
+    @property
+    def refill_seconds(self) -> float:
+        """Время, за которое пустая корзина наполняется полностью."""
+        return self.burst / self.rate
+
+
+class MemoryBackend:
+    """Корзины в памяти воркера: key -> (токены, время обновления)."""
+
+    def __init__(self, maxsize: int):
+        self._buckets = TTLCache(maxsize=maxsize, ttl=0)
+
+    async def hit(self, key: str, limit: Limit) -> float:
+        """Забирает токен. Возвращает 0 или число секунд до появления токена."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (limit.burst, now))
+        tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / limit.rate
+        self._buckets.set(key, (tokens, now), limit.refill_seconds)
+        return retry_after
+
+
+class RedisBackend:
+    """Корзины в Redis, общие для всех воркеров."""
+
+    def __init__(self, client: redis.Redis):
+        self.client = client
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def hit(self, key: str, limit: Limit) -> float:
+        retry_after = await self._script(keys=[f"rate-limit:{key}"],
+                                         args=[limit.rate, limit.burst])
+        return float(retry_after)
+
+
+def make_backend() -> MemoryBackend | RedisBackend:
+    if config.REDIS_URL:
+        return RedisBackend(redis.from_url(config.REDIS_URL))
+    return MemoryBackend(maxsize=config.RATE_LIMIT_CACHE_SIZE)
+
+
+rate_limiter = make_backend()
+role_limits = {role: Limit.parse(value)
+               for role, value in config.RATE_LIMIT_ROLES.items()}
+
+
+async def consume(name: str, key: str, limit: Limit) -> None:
+    """Забирает токен из корзины name:key или выбрасывает 429."""
+    if not config.RATE_LIMIT_ENABLED:
+        return
+    try:
+        retry_after = await rate_limiter.hit(f"{name}:{key}", limit)
+    except redis.RedisError as exc:
+        logger.warning(f"Rate limiter unavailable, request allowed: {exc}")
+        return
+    if retry_after > 0:
+        RATE_LIMITED.labels(name).inc()
+        raise rate_limit_exceeded(math.ceil(retry_after))
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimit:
+    """Зависимость маршрута: ограничивает частоту запросов с одного IP."""
+
+    def __init__(self, name: str, limit: str):
+        self.name = name
+        self.limit = Limit.parse(limit)
+
+    async def __call__(self, request: Request):
+        await consume(self.name, f"ip:{client_ip(request)}", self.limit)
+
+
+async def limit_user(user) -> None:
+    """Применяет лимит роли пользователя, если он задан в конфигурации."""
+    limit = role_limits.get(user.role)
+    if limit is not None:
+        await consume(f"role:{user.role}", f"user:{user.id}", limit)
@@ -2,6 +2,13 @@
 Модуль для управления доступа к эндпоинтам на основе ролей.
 Можно использовать класс PermissionChecker как зависимость
 напрямую или создавать на его основе аннотированные роли.
+
+При config.AUTH_FAST_PATH текущий пользователь — TokenUser из claims
+токена, а не модель User, поэтому обработчикам доступны только
+id, email и role.
+
+PermissionChecker также применяет лимит частоты запросов роли
+пользователя из config.RATE_LIMIT_ROLES (см. app.rate_limit).
 """
 from typing import Annotated
 
@@ -10,15 +17,17 @@ from fastapi import Depends
 from app.auth import get_current_user
 from app.exceptions import AuthorizationError
 from app.models.users import User
+from app.rate_limit import limit_user
 
 
 class PermissionChecker:
     def __init__(self, required_roles: set):
         self.required_roles = required_roles
 
-    def __call__(self, current_user: Annotated[User, Depends(get_current_user)]):
+    async def __call__(self, current_user: Annotated[User, Depends(get_current_user)]):
         if current_user.role not in self.required_roles:
             raise AuthorizationError
+        await limit_user(current_user)
         return current_user
 
 
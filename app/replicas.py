@@ -0,0 +1,194 @@
+"""
+Модуль маршрутизации чтения на реплики БД.
+
+Обработчики только для чтения получают сессию через get_read_db:
+она привязана к соединению одной из здоровых реплик, выбранной по кругу
+или по наименьшему числу открытых сессий. Если соединиться с репликой
+не удалось, реплика исключается, а сессия открывается к основной БД.
+Исключённые реплики возвращаются фоновой проверкой, которая также
+исключает реплики с отставанием больше DB_REPLICA_MAX_LAG.
+
+Read-your-writes: запрос на запись помечает свой заголовок
+Authorization, и в течение DB_READ_YOUR_WRITES_SECONDS чтения с тем же
+заголовком идут в основную БД. Анонимные чтения не привязаны к клиенту
+и всегда идут на реплики.
+"""
+import asyncio
+import hashlib
+import itertools
+import time
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from contextlib import asynccontextmanager
+
+import redis.asyncio as redis
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.cache import TTLCache
+from app.config import config
+from app.database import async_session_maker, replica_engines
+
+CONNECT_ERRORS = (DBAPIError, OSError, TimeoutError)
+REPLICATION_LAG = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+    "THEN 0 ELSE coalesce("
+    "extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaSet:
+    """Выбор реплики, учёт её здоровья и открытие сессий чтения."""
+
+    def __init__(self, engines: list[AsyncEngine], selection: str,
+                 check_interval: float, max_lag: float):
+        self.engines = engines
+        self.selection = selection
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self.healthy = set(engines)
+        self.sessions = dict.fromkeys(engines, 0)
+        self._turn = itertools.count()
+        self._next_check = 0.0
+
+    def choose(self) -> AsyncEngine | None:
+        """Здоровая реплика по стратегии DB_REPLICA_SELECTION или None."""
+        candidates = [engine for engine in self.engines
+                      if engine in self.healthy]
+        if not candidates:
+            return None
+        if self.selection == "least_connections":
+            return min(candidates, key=self.sessions.__getitem__)
+        return candidates[next(self._turn) % len(candidates)]
+
+    def mark_down(self, engine: AsyncEngine, reason: object) -> None:
+        if engine in self.healthy:
+            logger.warning(f"Replica {engine.url.host} excluded: {reason}")
+        self.healthy.discard(engine)
+
+    async def check(self, engine: AsyncEngine) -> None:
+        """Проверяет доступность и отставание реплики."""
+        try:
+            async with engine.connect() as conn:
+                lag = await conn.scalar(REPLICATION_LAG)
+        except CONNECT_ERRORS as exc:
+            self.mark_down(engine, exc)
+            return
+        if lag > self.max_lag:
+            self.mark_down(engine, f"replication lag {lag:.1f}s")
+        elif engine not in self.healthy:
+            logger.info(f"Replica {engine.url.host} restored")
+            self.healthy.add(engine)
+
+    def schedule_checks(self) -> None:
+        """Запускает фоновую проверку реплик не чаще check_interval."""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        for engine in self.engines:
+            run_in_background(self.check(engine))
+
+    @asynccontextmanager
+    async def session(
+            self, primary: bool = False) -> AsyncGenerator[AsyncSession]:
+        """Сессия реплики, а при primary=True или без реплик — основной БД."""
+        if not primary and self.engines:
+            self.schedule_checks()
+            while (engine := self.choose()) is not None:
+                try:
+                    conn = await engine.connect()
+                except CONNECT_ERRORS as exc:
+                    self.mark_down(engine, exc)
+                    continue
+                self.sessions[engine] += 1
+                try:
+                    async with conn, async_session_maker(bind=conn) as session:
+                        yield session
+                finally:
+                    self.sessions[engine] -= 1
+                return
+        async with async_session_maker() as session:
+            yield session
+
+
+class RecentWriters:
+    """
+    Клиенты, недавно выполнявшие запись. Ключ — хэш заголовка
+    Authorization. С REDIS_URL отметки общие для всех воркеров.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._local = TTLCache(maxsize=100_000, ttl=window)
+        self._redis = (redis.from_url(config.REDIS_URL) if config.REDIS_URL
+                       else None)
+
+    @staticmethod
+    def key(authorization: str) -> str:
+        digest = hashlib.blake2b(authorization.encode(),
+                                 digest_size=16).hexdigest()
+        return f"recent-writer:{digest}"
+
+    async def mark(self, authorization: str) -> None:
+        key = self.key(authorization)
+        self._local.set(key, True)
+        if self._redis is not None:
+            try:
+                await self._redis.set(key, 1, px=int(self.window * 1000))
+            except redis.RedisError as exc:
+                logger.warning(f"Failed to mark recent writer: {exc}")
+
+    async def contains(self, authorization: str) -> bool:
+        key = self.key(authorization)
+        if self._local.get(key) is not None:
+            return True
+        if self._redis is None:
+            return False
+        try:
+            return bool(await self._redis.exists(key))
+        except redis.RedisError:
+            # Без данных о записях безопаснее читать с основной БД.
+            return True
+
+
+_background_tasks: set[asyncio.Task] = set()
+
+
+def run_in_background(coro: Awaitable) -> None:
+    """Запускает корутину, не дожидаясь её и сохраняя ссылку на задачу."""
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def drain_background_tasks(timeout: float) -> None:
+    """Ждёт фоновые задачи при остановке воркера, оставшиеся отменяет."""
+    if not _background_tasks:
+        return
+    _, pending = await asyncio.wait(set(_background_tasks), timeout=timeout)
+    for task in pending:
+        task.cancel()
+
+
+def repeat_after_replica_lag(invalidate: Callable[[], Awaitable]) -> None:
+    """
+    Повторяет инвалидацию кэша через DB_REPLICA_MAX_LAG секунд.
+    Чтение с отстающей реплики сразу после первой инвалидации могло
+    снова закэшировать старые данные под новой версией.
+    """
+    if not replicas.engines:
+        return
+
+    async def repeat():
+        await asyncio.sleep(replicas.max_lag)
+        await invalidate()
+
+    run_in_background(repeat())
+
+
+replicas = ReplicaSet(replica_engines, selection=config.DB_REPLICA_SELECTION,
+                      check_interval=config.DB_REPLICA_CHECK_INTERVAL,
+                      max_lag=config.DB_REPLICA_MAX_LAG)
+recent_writers = RecentWriters(window=config.DB_READ_YOUR_WRITES_SECONDS)
@@ -0,0 +1,220 @@
+"""
+Модуль с кэшем ответов анонимных GET-запросов к каталогу.
+
+Обработчики помечаются декоратором cached с набором тегов. Кэшируются
+только ответы 200 с известной длиной (потоковые выгрузки проходят мимо)
+на запросы без заголовка Authorization. Ключ — путь и строка запроса.
+
+Инвалидация по тегам устроена через версии: каждая запись хранит версии
+своих тегов на момент чтения из БД, а обработчики записи увеличивают
+версии затронутых тегов. Запись с устаревшей версией считается промахом.
+
+Каждый закэшированный ответ получает сильный ETag, а запрос
+с совпадающим If-None-Match получает 304 без тела.
+"""
+import hashlib
+import json
+from collections.abc import Callable
+
+import redis.asyncio as redis
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.cache import TTLCache
+from app.config import config
+from app.replicas import repeat_after_replica_lag
+
+# users — встроенные в товары продавцы (expand=seller): обработчики,
+# изменяющие пользователей, должны сбрасывать этот тег.
+TAGS = ("categories", "products", "reviews", "users")
+CACHEABLE_PREFIXES = ("/products", "/categories", "/reviews")
+CACHE_CONTROL = b"no-cache"
+
+
+def cached(*tags: str, ttl: int | None = None) -> Callable:
+    """Помечает обработчик как кэшируемый с указанными тегами."""
+    unknown = set(tags) - set(TAGS)
+    if unknown:
+        raise ValueError(f"Unknown response cache tags: {unknown}")
+
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.cache_tags = tags
+        endpoint.cache_ttl = ttl or config.RESPONSE_CACHE_TTL
+        return endpoint
+
+    return decorator
+
+
+class MemoryBackend:
+    """LRU-кэш в памяти воркера. Инвалидация видна только этому воркеру."""
+
+    def __init__(self, maxsize: int, ttl: int):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._versions = dict.fromkeys(TAGS, 0)
+
+    async def get(self, key: str) -> bytes | None:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._entries.set(key, value, ttl)
+
+    async def tag_versions(self) -> dict[str, int]:
+        return dict(self._versions)
+
+    async def bump(self, tags: tuple[str, ...]) -> None:
+        for tag in tags:
+            self._versions[tag] += 1
+
+
+class RedisBackend:
+    """Кэш в Redis, общий для всех воркеров."""
+
+    def __init__(self, client: redis.Redis):
+        self.client = client
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.client.get(f"response:{key}")
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        await self.client.set(f"response:{key}", value, ex=ttl)
+
+    async def tag_versions(self) -> dict[str, int]:
+        values = await self.client.mget([f"response-tag:{tag}" for tag in TAGS])
+        return {tag: int(value or 0) for tag, value in zip(TAGS, values, strict=True)}
+
+    async def bump(self, tags: tuple[str, ...]) -> None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(f"response-tag:{tag}")
+            await pipe.execute()
+
+
+def make_backend() -> MemoryBackend | RedisBackend:
+    if config.REDIS_URL:
+        return RedisBackend(redis.from_url(config.REDIS_URL))
+    return MemoryBackend(maxsize=config.RESPONSE_CACHE_SIZE,
+                         ttl=config.RESPONSE_CACHE_TTL)
+
+
+response_cache = make_backend()
+
+
+async def invalidate(*tags: str) -> None:
+    """Сбрасывает ответы с указанными тегами. Вызывается после коммита."""
+    await response_cache.bump(tags)
+    repeat_after_replica_lag(lambda: response_cache.bump(tags))
+
+
+def encode_entry(etag: bytes, versions: dict[str, int], body: bytes) -> bytes:
+    header = json.dumps({"etag": etag.decode(), "tags": versions}).encode()
+    return header + b"\n" + body
+
+
+def decode_entry(value: bytes) -> tuple[bytes, dict[str, int], bytes]:
+    header, body = value.split(b"\n", 1)
+    meta = json.loads(header)
+    return meta["etag"].encode(), meta["tags"], body
+
+
+def make_etag(body: bytes) -> bytes:
+    return b'"' + hashlib.blake2b(body, digest_size=16).hexdigest().encode() + b'"'
+
+
+def get_header(scope: Scope, name: bytes) -> bytes | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+def etag_matches(if_none_match: bytes | None, etag: bytes) -> bool:
+    if if_none_match is None:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(b",")]
+    return etag in candidates or b"*" in candidates
+
+
+class ResponseCacheMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if not self.is_candidate(scope):
+            await self.app(scope, receive, send)
+            return
+
+        key = scope["path"]
+        if scope["query_string"]:
+            key += "?" + scope["query_string"].decode("latin-1")
+        if_none_match = get_header(scope, b"if-none-match")
+
+        # Версии читаются до обработчика: если тег изменится во время
+        # чтения из БД, ответ будет сохранён со старой версией
+        # и не будет отдан следующему запросу.
+        versions = await response_cache.tag_versions()
+        entry = await response_cache.get(key)
+        if entry is not None:
+            etag, entry_versions, body = decode_entry(entry)
+            if all(versions[tag] == version for tag, version in entry_versions.items()):
+                await self.send_cached(send, etag, body, if_none_match)
+                return
+
+        start: Message | None = None
+        chunks: list[bytes] = []
+
+        async def send_with_etag(message: Message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                if message["status"] != 200 or b"content-length" not in headers:
+                    await send(message)
+                    return
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            endpoint = getattr(scope.get("route"), "endpoint", None)
+            tags = getattr(endpoint, "cache_tags", None)
+            if tags is None:
+                await send(start)
+                await send({"type": "http.response.body", "body": body})
+                return
+            etag = make_etag(body)
+            await response_cache.set(
+                key, encode_entry(etag, {tag: versions[tag] for tag in tags}, body),
+                endpoint.cache_ttl)
+            await self.send_cached(send, etag, body, if_none_match,
+                                   start.get("headers", []))
+
+        await self.app(scope, receive, send_with_etag)
+
+    @staticmethod
+    def is_candidate(scope: Scope) -> bool:
+        return (scope["type"] == "http"
+                and scope["method"] == "GET"
+                and scope["path"].startswith(CACHEABLE_PREFIXES)
+                and get_header(scope, b"authorization") is None)
+
+    @staticmethod
+    async def send_cached(send: Send, etag: bytes, body: bytes,
+                          if_none_match: bytes | None,
+                          headers: list | None = None):
+        """Отправляет тело с ETag или 304, если клиент уже его имеет."""
+        if headers is None:
+            headers = [(b"content-type", b"application/json"),
+                       (b"content-length", str(len(body)).encode())]
+        headers = [*headers, (b"etag", etag), (b"cache-control", CACHE_CONTROL)]
+        if etag_matches(if_none_match, etag):
+            headers = [(name, value) for name, value in headers
+                       if name not in (b"content-length", b"content-type")]
+            await send({"type": "http.response.start", "status": 304,
+                        "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": headers})
+        await send({"type": "http.response.body", "body": body})
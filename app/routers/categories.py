@@ -3,27 +3,63 @@
 """
 from typing import Annotated
 
-from fastapi import APIRouter, Body, status
+from fastapi import APIRouter, Body, Depends, status
 from sqlalchemy import select, update
 
-from app.crud import get_category_or_404, get_parent_category_or_404
-from app.dependencies import AsyncDBSession
+from app.category_cache import category_cache
+from app.crud import (
+    get_category_or_404,
+    get_parent_category_or_404,
+    hide_category_listings,
+    sync_category_listings,
+)
+from app.dependencies import AsyncDBSession, AsyncReadDBSession
 from app.exceptions import CategorySelfParentError
+from app.loaders import Expand
 from app.models.categories import Category as CategoryModel
+from app.response_cache import cached, invalidate
 from app.schemas import Category as CategorySchema
-from app.schemas import CategoryCreate
+from app.schemas import CategoryCreate, CategoryExpanded, CategoryTree, StreamFormat
+from app.serialization import category_rows, json_response
+from app.streaming import stream_response
 
 router = APIRouter(
     prefix="/categories", tags=["categories"],
 )
 
 
-@router.get("/", response_model=list[CategorySchema])
-async def get_all_categories(db: AsyncDBSession):
-    """Возвращает список всех категорий товаров."""
-    stmt = select(CategoryModel).where(CategoryModel.is_active)
-    categories = await db.scalars(stmt)
-    return categories.all()
+@router.get("/", response_model=list[CategoryExpanded])
+@cached("categories")
+async def get_all_categories(
+        db: AsyncReadDBSession,
+        expand: Annotated[frozenset[str], Depends(Expand("parent"))],
+        stream: StreamFormat | None = None):
+    """
+    Возвращает список всех категорий товаров.
+    С expand=parent в каждую категорию встраивается активная родительская.
+    С stream=json или stream=ndjson список читается из БД и отдаётся
+    потоком, expand при этом не учитывается.
+    """
+    if stream is not None:
+        stmt = select(*category_rows.columns).where(CategoryModel.is_active)
+        return stream_response(stmt.order_by(CategoryModel.id), category_rows, stream)
+    snapshot = await category_cache.snapshot(db)
+    if "parent" in expand:
+        return json_response(snapshot.expanded_json)
+    return json_response(snapshot.categories_json)
+
+
+@router.get("/tree", response_model=list[CategoryTree])
+@cached("categories")
+async def get_category_tree(db: AsyncReadDBSession):
+    """Возвращает дерево активных категорий."""
+    return json_response((await category_cache.snapshot(db)).tree_json)
+
+
+@router.get("/cache-stats")
+async def get_category_cache_stats():
+    """Возвращает счётчики попаданий и промахов кэша категорий."""
+    return category_cache.stats()
 
 
 @router.post("/", response_model=CategorySchema,
@@ -36,6 +72,8 @@ async def create_category(category: CategoryCreate,
     db_category = CategoryModel(**category.model_dump())
     db.add(db_category)
     await db.commit()
+    await category_cache.invalidate()
+    await invalidate("categories")
     return db_category
 
 
@@ -50,10 +88,15 @@ async def update_category(category_id: int,
         if parent_category.id == category_id:
             raise CategorySelfParentError
 
+    values = category.model_dump(exclude_unset=True)
     await db.execute(update(CategoryModel).where(
-        CategoryModel.id == category_id).values(
-            **category.model_dump(exclude_unset=True)))
+        CategoryModel.id == category_id).values(**values))
+    if ("parent_id" in values
+            and values["parent_id"] != category_from_db.parent_id):
+        await sync_category_listings(db, category_id)
     await db.commit()
+    await category_cache.invalidate()
+    await invalidate("categories")
     await db.refresh(category_from_db)
     return category_from_db
 
@@ -65,5 +108,8 @@ async def delete_category(category_id: int,
     category = await get_category_or_404(db, category_id)
     await db.execute(update(CategoryModel).where(
         CategoryModel.id == category_id).values(is_active=False))
+    await hide_category_listings(db, category_id)
     await db.commit()
+    await category_cache.invalidate()
+    await invalidate("categories")
     return category
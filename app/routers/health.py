@@ -0,0 +1,27 @@
+"""
+Модуль с пробами состояния воркера для оркестратора и балансировщика.
+"""
+from fastapi import APIRouter, Response, status
+
+from app.config import config
+from app.lifespan import database_available, worker_state
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live")
+async def live():
+    """Воркер запущен и обрабатывает запросы. БД не проверяется."""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def ready(response: Response):
+    """Воркер завершил запуск, не останавливается и основная БД доступна."""
+    if not worker_state.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "starting" if not worker_state.started else "stopping"}
+    if not await database_available(config.HEALTH_CHECK_TIMEOUT):
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "database unavailable"}
+    return {"status": "ok", "startup_seconds": worker_state.startup_seconds}
@@ -0,0 +1,97 @@
+"""
+Модуль с эндпоинтами заказов: резервирование товара, оплата и отмена.
+"""
+from datetime import datetime, timedelta
+from typing import Annotated
+
+from fastapi import APIRouter, Body, status
+from sqlalchemy import select, update
+
+from app.config import config
+from app.crud import release_reserved_orders, reserve_stock
+from app.dependencies import AsyncDBSession
+from app.exceptions import OrderNotFound, OrderNotReservedError
+from app.models.orders import Order as OrderModel
+from app.models.orders import OrderItem as OrderItemModel
+from app.rbac import Buyer
+from app.response_cache import invalidate
+from app.schemas import Order, OrderCreate
+
+router = APIRouter(prefix="/orders", tags=["orders"])
+
+
+async def get_order_or_404(db: AsyncDBSession, order_id: int,
+                           user_id: int) -> OrderModel:
+    """Проверка, существует ли заказ текущего пользователя."""
+    order = await db.scalar(select(OrderModel).where(
+        OrderModel.id == order_id, OrderModel.user_id == user_id))
+    if order is None:
+        raise OrderNotFound
+    return order
+
+
+@router.post("/", response_model=Order, status_code=status.HTTP_201_CREATED)
+async def create_order(order: Annotated[OrderCreate, Body()],
+                       db: AsyncDBSession,
+                       user: Buyer):
+    """
+    Создаёт заказ и резервирует товар до оплаты. Если хотя бы одной
+    позиции не хватает на складе, ничего не резервируется.
+    """
+    quantities: dict[int, int] = {}
+    for item in order.items:
+        quantities[item.product_id] = (
+            quantities.get(item.product_id, 0) + item.quantity)
+    prices = await reserve_stock(db, quantities)
+    order_db = OrderModel(
+        user_id=user.id,
+        total=sum(prices[product_id] * quantity
+                  for product_id, quantity in quantities.items()),
+        expires_at=(datetime.now()
+                    + timedelta(minutes=config.ORDER_RESERVATION_MINUTES)),
+        items=[
+            OrderItemModel(product_id=product_id, quantity=quantity,
+                           unit_price=prices[product_id])
+            for product_id, quantity in quantities.items()
+        ],
+    )
+    db.add(order_db)
+    await db.commit()
+    await invalidate("products")
+    return order_db
+
+
+@router.get("/{order_id}", response_model=Order)
+async def get_order(order_id: int, db: AsyncDBSession, user: Buyer):
+    """Возвращает заказ текущего пользователя."""
+    return await get_order_or_404(db, order_id, user.id)
+
+
+@router.post("/{order_id}/confirm", response_model=Order)
+async def confirm_order(order_id: int, db: AsyncDBSession, user: Buyer):
+    """Подтверждает оплату заказа, пока не истёк его резерв."""
+    result = await db.execute(update(OrderModel).where(
+        OrderModel.id == order_id,
+        OrderModel.user_id == user.id,
+        OrderModel.status == "reserved",
+        OrderModel.expires_at > datetime.now(),
+    ).values(status="paid"))
+    await db.commit()
+    order = await get_order_or_404(db, order_id, user.id)
+    if result.rowcount == 0:
+        raise OrderNotReservedError
+    return order
+
+
+@router.post("/{order_id}/cancel", response_model=Order)
+async def cancel_order(order_id: int, db: AsyncDBSession, user: Buyer):
+    """Отменяет неоплаченный заказ и возвращает товар на склад."""
+    released = await release_reserved_orders(
+        db, "cancelled",
+        OrderModel.id == order_id, OrderModel.user_id == user.id)
+    await db.commit()
+    order = await get_order_or_404(db, order_id, user.id)
+    if released == 0:
+        raise OrderNotReservedError
+    await invalidate("products")
+    return order
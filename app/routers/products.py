@@ -3,34 +3,212 @@
 """
 from typing import Annotated
 
-from fastapi import APIRouter, Body, status
-from sqlalchemy import select, update
+from fastapi import APIRouter, Body, Depends, Query, Request, status
+from sqlalchemy import func, literal_column, select
 
+from app.bulk_import import import_products
+from app.category_cache import category_cache
 from app.crud import (
-    get_category_or_404,
+    get_cached_category_or_404,
     get_product_category_or_400,
-    get_product_or_404,
+    get_product_with_category_or_404,
+    sync_product_listings,
+    update_own_product_or_error,
 )
-from app.dependencies import AsyncDBSession
-from app.exceptions import NotProductOwnerError
-from app.models import Product
-from app.models.categories import Category
+from app.dependencies import AsyncDBSession, AsyncReadDBSession, Loader
+from app.exceptions import InvalidCursorError
+from app.loaders import Expand
+from app.models import Product, ProductListing, User
+from app.pagination import decode_cursor, encode_cursor, keyset_clause, keyset_order
 from app.rbac import Seller
+from app.response_cache import cached, invalidate
 from app.schemas import Product as ProductSchema
-from app.schemas import ProductCreate
+from app.schemas import (
+    BulkImportResult,
+    ProductCreate,
+    ProductExpanded,
+    ProductFilter,
+    ProductPage,
+    ProductSearch,
+)
+from app.search import (
+    fulltext_match,
+    fulltext_rank,
+    prefix_tsquery,
+    trigram_match,
+    trigram_rank,
+)
+from app.serialization import json_response, product_rows, seller_rows
+from app.streaming import stream_response
+from app.tasks import schedule_search_refresh
 
 router = APIRouter(
     prefix="/products", tags=["products"]
 )
 
+# Ключи сортировки списка товаров. Выражения совпадают с индексами
+# в app.models.product_listings, литерал 0 не выносится в параметр
+# запроса, чтобы планировщик сопоставил coalesce с индексом по выражению.
+SORT_KEYS = {
+    "id": [ProductListing.id],
+    "price": [ProductListing.price, ProductListing.id],
+    "rating": [func.coalesce(ProductListing.rating, literal_column("0")),
+               ProductListing.id],
+}
+
+
+def product_conditions(filters: ProductFilter) -> list:
+    """Условия выборки из витрины по фильтрам списка, без учёта курсора."""
+    conditions = [ProductListing.is_active]
+    if filters.in_stock:
+        conditions.append(ProductListing.in_stock)
+    if filters.category_id is not None:
+        conditions.append(ProductListing.category_id == filters.category_id)
+    if filters.seller_id is not None:
+        conditions.append(ProductListing.seller_id == filters.seller_id)
+    if filters.min_price is not None:
+        conditions.append(ProductListing.price >= filters.min_price)
+    if filters.max_price is not None:
+        conditions.append(ProductListing.price <= filters.max_price)
+    if filters.min_rating is not None:
+        conditions.append(ProductListing.rating >= filters.min_rating)
+    return conditions
+
+
+ProductExpand = Annotated[frozenset[str], Depends(Expand("category", "seller"))]
+# Позиция seller_id в строках, выбранных по listing_columns.
+SELLER_ID = len(product_rows.fields)
+
+
+def listing_columns(expand: frozenset[str]) -> list:
+    """Колонки product_rows и, при expand=seller, seller_id после них."""
+    if "seller" in expand:
+        return [*product_rows.columns, ProductListing.seller_id]
+    return product_rows.columns
+
+
+async def expand_products(rows: list, expand: frozenset[str],
+                          db: AsyncReadDBSession, loader: Loader) -> list[dict]:
+    """
+    Словари товаров со связанными объектами. Категории берутся из кэша
+    категорий, продавцы всей страницы загружаются одним запросом.
+    """
+    items = product_rows.to_dicts(rows)
+    if "category" in expand:
+        categories = (await category_cache.snapshot(db)).by_id
+        for item in items:
+            category = categories.get(item["category_id"])
+            item["category"] = category.model_dump() if category else None
+    if "seller" in expand:
+        sellers = await loader.load_many(User, [row[SELLER_ID] for row in rows])
+        for item, seller in zip(items, sellers, strict=True):
+            item["seller"] = seller_rows.object_dict(seller)
+    return items
+
+
+@router.get("/", response_model=ProductPage)
+@cached("products", "categories", "users")
+async def get_all_products(filters: Annotated[ProductFilter, Query()],
+                           expand: ProductExpand,
+                           db: AsyncReadDBSession, loader: Loader):
+    """
+    Возвращает страницу товаров с фильтрацией и сортировкой.
+    expand=category,seller встраивает в товары категорию и продавца.
+    С stream=json или stream=ndjson отдаёт потоком все подходящие
+    товары без пагинации (курсор, limit и expand не учитываются).
+    """
+    descending = filters.sort.startswith("-")
+    keys = SORT_KEYS[filters.sort.lstrip("-")]
+    conditions = product_conditions(filters)
+
+    if filters.stream is not None:
+        stmt = (select(*product_rows.columns).where(*conditions)
+                .order_by(*keyset_order(keys, descending)))
+        return stream_response(stmt, product_rows, filters.stream)
+
+    if filters.cursor is not None:
+        values = decode_cursor(filters.cursor, len(keys))
+        conditions.append(keyset_clause(keys, values, descending))
+
+    rows = (await db.execute(
+        select(*listing_columns(expand), *keys).where(*conditions)
+        .order_by(*keyset_order(keys, descending))
+        .limit(filters.limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > filters.limit:
+        rows = rows[:filters.limit]
+        next_cursor = encode_cursor(*rows[-1][-len(keys):])
+    return product_rows.items_page_response(
+        await expand_products(rows, expand, db, loader), next_cursor)
 
-@router.get("/", response_model=list[ProductSchema])
-async def get_all_products(db: AsyncDBSession):
-    """Возвращает список всех товаров."""
-    products = await db.scalars(
-        select(Product).join(Category).where(
-            Product.is_active, Category.is_active, Product.stock > 0))
-    return products.all()
+
+# Режимы поиска, записываемые первым значением курсора.
+SEARCH_FULLTEXT = 0
+SEARCH_TRIGRAM = 1
+
+
+@router.get("/search", response_model=ProductPage)
+@cached("products", "categories", "users")
+async def search_products(params: Annotated[ProductSearch, Query()],
+                          expand: ProductExpand,
+                          db: AsyncReadDBSession, loader: Loader):
+    """
+    Полнотекстовый поиск товаров по названию и описанию с ранжированием.
+    Если по словам запроса ничего не найдено, выполняется нечёткий
+    поиск по названию. Страницы переключаются по курсору, как в списке,
+    expand работает так же, как в списке.
+    """
+    query = prefix_tsquery(params.q)
+    if query is None:
+        return {"items": [], "next_cursor": None}
+
+    conditions = [ProductListing.is_active]
+    if params.category_id is not None:
+        conditions.append(ProductListing.category_id == params.category_id)
+
+    mode, after = SEARCH_FULLTEXT, None
+    if params.cursor is not None:
+        mode, *after = decode_cursor(params.cursor, 3)
+        if mode not in (SEARCH_FULLTEXT, SEARCH_TRIGRAM):
+            raise InvalidCursorError
+
+    columns = listing_columns(expand)
+    if mode == SEARCH_FULLTEXT:
+        rows, next_cursor = await search_page(
+            db, columns, [*conditions, fulltext_match(query)],
+            fulltext_rank(query), SEARCH_FULLTEXT, after, params.limit)
+        if rows or after is not None:
+            return product_rows.items_page_response(
+                await expand_products(rows, expand, db, loader), next_cursor)
+        after = None
+
+    rows, next_cursor = await search_page(
+        db, columns, [*conditions, trigram_match(params.q)],
+        trigram_rank(params.q), SEARCH_TRIGRAM, after, params.limit)
+    return product_rows.items_page_response(
+        await expand_products(rows, expand, db, loader), next_cursor)
+
+
+async def search_page(db: AsyncDBSession, columns: list, conditions: list, score,
+                      mode: int, after: list | None,
+                      limit: int) -> tuple[list, str | None]:
+    """
+    Страница результатов поиска по убыванию score и id: строки
+    с колонками columns и курсор следующей страницы.
+    """
+    keys = [score, ProductListing.id]
+    if after is not None:
+        conditions = [*conditions, keyset_clause(keys, after, descending=True)]
+    rows = (await db.execute(
+        select(*columns, *keys).where(*conditions)
+        .order_by(*keyset_order(keys, descending=True))
+        .limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(mode, *rows[-1][-len(keys):])
+    return rows, next_cursor
 
 
 @router.post("/", response_model=ProductSchema,
@@ -42,25 +220,57 @@ async def create_product(product: Annotated[ProductCreate, Body()],
     await get_product_category_or_400(db, product.category_id)
     product_db = Product(**product.model_dump(), seller_id=current_user.id)
     db.add(product_db)
+    await db.flush()
+    await sync_product_listings(db, Product.id == product_db.id)
     await db.commit()
+    await invalidate("products")
     return product_db
 
 
-@router.get("/category/{category_id}", response_model=list[ProductSchema])
-async def get_products_by_category(category_id: int, db: AsyncDBSession):
-    """Возвращает список товаров в указанной категории."""
-    await get_category_or_404(db, category_id)
-    products = await db.scalars(select(Product).where(
-        Product.category_id == category_id, Product.is_active))
-    return products.all()
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_upsert_products(request: Request, db: AsyncDBSession,
+                               current_user: Seller):
+    """
+    Создаёт или обновляет товары текущего продавца из CSV (text/csv)
+    или NDJSON (application/x-ndjson). Товары сопоставляются по sku.
+    """
+    result = await import_products(request, db, current_user.id)
+    if result.upserted:
+        await invalidate("products")
+        await schedule_search_refresh()
+    return result
+
 
+@router.get("/category/{category_id}", response_model=list[ProductExpanded])
+@cached("products", "categories", "users")
+async def get_products_by_category(category_id: int, expand: ProductExpand,
+                                   db: AsyncReadDBSession, loader: Loader,
+                                   include_descendants: bool = False):
+    """
+    Возвращает список товаров в указанной категории.
+    С include_descendants=true — также во всех её дочерних категориях.
+    """
+    await get_cached_category_or_404(db, category_id)
+    if include_descendants:
+        in_category = ProductListing.category_path.contains([category_id])
+    else:
+        in_category = ProductListing.category_id == category_id
+    rows = (await db.execute(select(*listing_columns(expand)).where(
+        in_category, ProductListing.is_active))).all()
+    return product_rows.items_response(
+        await expand_products(rows, expand, db, loader))
 
-@router.get("/{product_id}", response_model=ProductSchema)
-async def get_product(product_id: int, db: AsyncDBSession):
+
+@router.get("/{product_id}", response_model=ProductExpanded)
+@cached("products", "categories", "users")
+async def get_product(product_id: int, expand: ProductExpand,
+                      db: AsyncReadDBSession, loader: Loader):
     """Возвращает детальную информацию о товаре по его ID"""
-    product = await get_product_or_404(db, product_id)
-    await get_product_category_or_400(db, product.category_id)
-    return product
+    product = await get_product_with_category_or_404(db, product_id)
+    # Строка в формате listing_columns: поля схемы и seller_id.
+    row = (*(getattr(product, name) for name in product_rows.fields), product.seller_id)
+    [item] = await expand_products([row], expand, db, loader)
+    return json_response(product_rows.row.dump_json(item))
 
 
 @router.put("/{product_id}", response_model=ProductSchema)
@@ -69,13 +279,11 @@ async def update_product(product_id: int,
                          db: AsyncDBSession,
                          current_user: Seller):
     """Обновляет товар, если он принадлежит текущему продавцу."""
-    product_db = await get_product_or_404(db, product_id)
-    if product_db.seller_id != current_user.id:
-        raise NotProductOwnerError
-    await get_product_category_or_400(db, product.category_id)
-    await db.execute(update(Product).where(Product.id == product_id)
-               .values(**product.model_dump()))
+    product_db = await update_own_product_or_error(
+        db, product_id, current_user.id, product.category_id,
+        **product.model_dump())
     await db.commit()
+    await invalidate("products")
     return product_db
 
 
@@ -83,10 +291,8 @@ async def update_product(product_id: int,
 async def delete_product(product_id: int, db: AsyncDBSession,
                          current_user: Seller):
     """Удаляет товар по его ID"""
-    product = await get_product_or_404(db, product_id)
-    if product.seller_id != current_user.id:
-        raise NotProductOwnerError
-    await get_product_category_or_400(db, product.category_id)
-    product.is_active = False
+    product = await update_own_product_or_error(
+        db, product_id, current_user.id, Product.category_id, is_active=False)
     await db.commit()
+    await invalidate("products")
     return product
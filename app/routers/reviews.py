@@ -3,37 +3,87 @@
 """
 from typing import Annotated
 
-from fastapi import APIRouter, Body
+from fastapi import APIRouter, Body, Depends
 from sqlalchemy import select
 
 from app.crud import (
-    check_review_exists,
+    change_product_rating,
+    deactivate_review_or_404,
     get_product_or_404,
-    get_review_or_404,
-    update_product_rating,
+    insert_review_or_error,
 )
-from app.dependencies import AsyncDBSession
+from app.config import config
+from app.dependencies import AsyncDBSession, AsyncReadDBSession, Loader
+from app.loaders import Expand
+from app.models.products import Product as ProductModel
 from app.models.reviews import Review as ReviewModel
 from app.rbac import Admin, Buyer
-from app.schemas import Review, ReviewCreate
+from app.response_cache import cached, invalidate
+from app.schemas import Review, ReviewCreate, ReviewExpanded, StreamFormat
+from app.serialization import product_rows, review_rows
+from app.streaming import stream_response
+from app.tasks import schedule_rating_recompute
 
 router = APIRouter(tags=["reviews"])
 
+ReviewExpand = Annotated[frozenset[str], Depends(Expand("product"))]
 
-@router.get("/reviews", response_model=list[Review])
-async def get_all_reviews(db: AsyncDBSession):
-    """Возвращает список всех отзывов."""
-    reviews = await db.scalars(select(ReviewModel).where(ReviewModel.is_active))
-    return reviews.all()
 
+async def commit_review_change(db: AsyncDBSession, review: ReviewModel,
+                               count: int) -> None:
+    """
+    Фиксирует добавление (count=1) или удаление (count=-1) отзыва
+    и обновляет оценку товара: инкрементом в той же транзакции
+    или отложенным пересчётом в Celery при BACKGROUND_RATING_UPDATES.
+    """
+    if config.BACKGROUND_RATING_UPDATES:
+        await db.commit()
+        await schedule_rating_recompute(review.product_id)
+    else:
+        await change_product_rating(db, review.product_id, review.grade, count)
+        await db.commit()
+    await invalidate("reviews", "products")
 
-@router.get("/products/{product_id}/reviews", response_model=list[Review])
-async def get_reviews_by_product(product_id: int, db: AsyncDBSession):
-    """Возвращает список отзывов к конкретному товару."""
-    await get_product_or_404(db, product_id)
-    reviews = await db.scalars(select(ReviewModel).where(
-        ReviewModel.product_id == product_id, ReviewModel.is_active))
-    return reviews.all()
+
+@router.get("/reviews", response_model=list[ReviewExpanded])
+@cached("reviews", "products")
+async def get_all_reviews(db: AsyncReadDBSession, expand: ReviewExpand,
+                          loader: Loader, stream: StreamFormat | None = None):
+    """
+    Возвращает список всех отзывов.
+    С expand=product в отзывы встраиваются товары, загруженные одним запросом.
+    С stream=json или stream=ndjson список отдаётся потоком без expand.
+    """
+    stmt = select(*review_rows.columns).where(ReviewModel.is_active)
+    if stream is not None:
+        return stream_response(stmt.order_by(ReviewModel.id), review_rows, stream)
+    rows = (await db.execute(stmt)).all()
+    if "product" not in expand:
+        return review_rows.response(rows)
+    items = review_rows.to_dicts(rows)
+    products = await loader.load_many(
+        ProductModel, [item["product_id"] for item in items])
+    for item, product in zip(items, products, strict=True):
+        item["product"] = product_rows.object_dict(product)
+    return review_rows.items_response(items)
+
+
+@router.get("/products/{product_id}/reviews", response_model=list[ReviewExpanded])
+@cached("reviews", "products")
+async def get_reviews_by_product(product_id: int, db: AsyncReadDBSession,
+                                 expand: ReviewExpand):
+    """
+    Возвращает список отзывов к конкретному товару.
+    С expand=product в каждый отзыв встраивается этот товар.
+    """
+    product = await get_product_or_404(db, product_id)
+    rows = (await db.execute(select(*review_rows.columns).where(
+        ReviewModel.product_id == product_id, ReviewModel.is_active))).all()
+    if "product" not in expand:
+        return review_rows.response(rows)
+    product_item = product_rows.object_dict(product)
+    return review_rows.items_response(
+        [{**item, "product": product_item} for item in review_rows.to_dicts(rows)])
 
 
 @router.post("/reviews", response_model=Review)
@@ -41,20 +91,14 @@ async def create_review(user: Buyer,
                         db: AsyncDBSession,
                         review: Annotated[ReviewCreate, Body()]):
     """Добавляет отзыв к указанному товару."""
-    await get_product_or_404(db, review.product_id)
-    await check_review_exists(db, user.id, review.product_id)
-    review_db = ReviewModel(**review.model_dump(), user_id=user.id)
-    db.add(review_db)
-    await db.commit()
-    await update_product_rating(db=db, product_id=review.product_id)
+    review_db = await insert_review_or_error(db, user.id, review)
+    await commit_review_change(db, review_db, count=1)
     return review_db
 
 
 @router.delete("/reviews/{review_id}")
 async def delete_review(review_id: int, db: AsyncDBSession, current_user: Admin):
     """Выполняет мягкое удаление товара, устанавливая is_active = False"""
-    review = await get_review_or_404(db, review_id)
-    review.is_active = False
-    await db.commit()
-    await update_product_rating(db=db, product_id=review.product_id)
+    review = await deactivate_review_or_404(db, review_id)
+    await commit_review_change(db, review, count=-1)
     return {"message": "Review deleted"}
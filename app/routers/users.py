@@ -1,52 +1,67 @@
 from typing import Annotated
 
 import jwt
-from fastapi import APIRouter, Body, status
-from sqlalchemy import select
+from fastapi import APIRouter, Body, Depends, status
 
-from app.auth import create_access_token, create_refresh_token, hash_password, verify_password
+from app.auth import (
+    create_access_token,
+    create_refresh_token,
+    get_current_user,
+    hash_password_async,
+    revoke_tokens,
+    token_claims,
+    verify_and_update_password,
+)
 from app.config import config
 from app.dependencies import AsyncDBSession, FormData
 from app.exceptions import IncorrectCredentialsError, RefreshTokenValidationError, UserExistsError
 from app.models.users import User as UserModel
+from app.rate_limit import RateLimit
 from app.schemas import User as UserSchema
 from app.schemas import UserCreate
+from app.statements import ACTIVE_USER_BY_EMAIL, USER_BY_EMAIL
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
-@router.post("/", response_model=UserSchema, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=UserSchema, status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(RateLimit("register", config.RATE_LIMIT_REGISTER))])
 async def create_user(user: Annotated[UserCreate, Body()], db: AsyncDBSession):
     """Регистрирует нового пользователя с ролью 'buyer' или 'seller'."""
-    user_db = await db.scalar(select(UserModel).where(
-        UserModel.email == user.email))
+    user_db = await db.scalar(USER_BY_EMAIL, {"email": user.email})
     if user_db:
         raise UserExistsError
 
     user_db = UserModel(email=user.email,
-                        hashed_password=hash_password(user.password),
+                        hashed_password=await hash_password_async(user.password),
                         role=user.role)
     db.add(user_db)
     await db.commit()
     return user_db
 
 
-@router.post("/token")
+@router.post("/token",
+             dependencies=[Depends(RateLimit("login", config.RATE_LIMIT_LOGIN))])
 async def login(form_data: FormData, db: AsyncDBSession):
     """Аутентифицирует пользователя и возвращает JWT с email, role, id."""
-    user = await db.scalar(select(UserModel).where(
-        UserModel.email == form_data.username, UserModel.is_active))
-    if not (user and verify_password(form_data.password, user.hashed_password)):
+    user = await db.scalar(ACTIVE_USER_BY_EMAIL, {"email": form_data.username})
+    if user is None:
+        raise IncorrectCredentialsError
+    verified, new_hash = await verify_and_update_password(
+        form_data.password, user.hashed_password)
+    if not verified:
         raise IncorrectCredentialsError
-    access_token = create_access_token(data={
-        "sub": user.email, "role": user.role, "id": user.id})
-    refresh_token = create_refresh_token(data={
-        "sub": user.email, "role": user.role, "id": user.id})
+    if new_hash is not None:
+        user.hashed_password = new_hash
+        await db.commit()
+    access_token = create_access_token(data=token_claims(user))
+    refresh_token = create_refresh_token(data=token_claims(user))
     return {"access_token": access_token, "refresh_token": refresh_token,
             "token_type": "bearer"}
 
 
-@router.post("/refresh-token")
+@router.post("/refresh-token",
+             dependencies=[Depends(RateLimit("refresh", config.RATE_LIMIT_REFRESH))])
 async def refresh_token(refresh_token: Annotated[str, Body()],
                         db: AsyncDBSession):
     """Обновляет access-токен с помощью refresh-токена."""
@@ -57,11 +72,15 @@ async def refresh_token(refresh_token: Annotated[str, Body()],
             raise RefreshTokenValidationError
     except jwt.exceptions.InvalidTokenError:
         raise RefreshTokenValidationError from None
-    user = await db.scalar(select(UserModel).where(
-        UserModel.email == email, UserModel.is_active))
-    if user is None:
+    user = await db.scalar(ACTIVE_USER_BY_EMAIL, {"email": email})
+    if user is None or payload.get("ver", 0) != user.token_version:
         raise RefreshTokenValidationError
-    access_token = create_access_token(data={
-        "sub": user.email, "role": user.role, "id": user.id
-    })
+    access_token = create_access_token(data=token_claims(user))
     return {"access_token": access_token, "token_type": "bearer"}
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(current_user: Annotated[UserModel, Depends(get_current_user)],
+                 db: AsyncDBSession):
+    """Отзывает все access- и refresh-токены пользователя."""
+    await revoke_tokens(db, current_user.id)
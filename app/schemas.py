@@ -1,6 +1,20 @@
 from datetime import UTC, datetime
+from typing import Annotated, Literal
 
-from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from pydantic import AfterValidator, BaseModel, ConfigDict, EmailStr, Field
+
+# Формат потоковой выгрузки списков: JSON-массив или NDJSON.
+StreamFormat = Literal["json", "ndjson"]
+
+
+def to_utc_seconds(value: datetime) -> datetime:
+    """Приводит дату к UTC и отбрасывает доли секунды."""
+    return value.astimezone(UTC).replace(microsecond=0)
+
+
+# Дата в UTC с точностью до секунды. pydantic сериализует её
+# без Python-кода как 2025-01-01T00:00:00Z.
+UTCDateTime = Annotated[datetime, AfterValidator(to_utc_seconds)]
 
 
 class CategoryCreate(BaseModel):
@@ -34,6 +48,26 @@ class Category(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class CategoryExpanded(Category):
+    """
+    Модель категории с родительской категорией при expand=parent.
+    """
+
+    parent: Category | None = Field(
+        default=None, description="Активная родительская категория (expand=parent)"
+        )
+
+
+class CategoryTree(Category):
+    """
+    Модель узла дерева категорий с вложенными дочерними категориями.
+    """
+
+    children: list["CategoryTree"] = Field(
+        default_factory=list, description="Дочерние категории"
+        )
+
+
 class ProductCreate(BaseModel):
     """
     Модель для создания и обновления товара.
@@ -74,10 +108,120 @@ class Product(BaseModel):
     stock: int = Field(description="Количество товара на складе")
     category_id: int = Field(description="ID категории")
     is_active: bool = Field(description="Активность товара")
+    rating: float | None = Field(default=None,
+                                 description="Средняя оценка товара")
+    sku: str | None = Field(default=None, description="Артикул продавца")
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class Seller(BaseModel):
+    """
+    Модель продавца, встраиваемая в товар при expand=seller. Маршруты
+    каталога публичные, поэтому в неё не попадают личные данные
+    пользователя, например email.
+    """
+
+    id: int = Field(description="Идентификатор продавца")
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ProductExpanded(Product):
+    """
+    Модель товара со связанными объектами, запрошенными в ?expand=.
+    """
+
+    category: Category | None = Field(
+        default=None, description="Категория товара (expand=category)"
+        )
+    seller: Seller | None = Field(
+        default=None, description="Продавец товара (expand=seller)"
+        )
+
+
+class ProductImportRow(ProductCreate):
+    """
+    Модель строки массовой загрузки товаров. Товар с уже существующим
+    у продавца sku обновляется.
+    """
+
+    sku: str = Field(min_length=1, max_length=64, description="Артикул продавца")
+
+
+class BulkRowError(BaseModel):
+    row: int = Field(description="Номер строки данных, начиная с 1")
+    errors: list[str] = Field(description="Ошибки строки")
+
+
+class BulkImportResult(BaseModel):
+    """
+    Модель отчёта о массовой загрузке товаров.
+    """
+
+    rows: int = Field(description="Прочитано строк данных")
+    upserted: int = Field(description="Создано или обновлено товаров")
+    failed: int = Field(description="Строк с ошибками")
+    errors: list[BulkRowError] = Field(description="Ошибки по строкам")
+    seconds: float = Field(description="Длительность загрузки")
+    rows_per_second: float = Field(description="Скорость загрузки, строк/с")
+
+
+class ProductFilter(BaseModel):
+    """
+    Модель query-параметров списка товаров: фильтры, сортировка и курсор.
+    """
+
+    category_id: int | None = Field(default=None, description="ID категории")
+    min_price: float | None = Field(default=None, ge=0,
+                                    description="Минимальная цена")
+    max_price: float | None = Field(default=None, ge=0,
+                                    description="Максимальная цена")
+    in_stock: bool = Field(default=True,
+                           description="Только товары в наличии")
+    seller_id: int | None = Field(default=None, description="ID продавца")
+    min_rating: float | None = Field(default=None, ge=0, le=5,
+                                     description="Минимальная оценка")
+    sort: Literal["id", "price", "-price", "rating", "-rating"] = Field(
+        default="id",
+        description="Поле сортировки, '-' — по убыванию"
+        )
+    cursor: str | None = Field(
+        default=None, description="Курсор из next_cursor предыдущей страницы"
+        )
+    limit: int = Field(default=20, ge=1, le=100,
+                       description="Размер страницы (1-100)")
+    stream: StreamFormat | None = Field(
+        default=None,
+        description="Выгрузить все товары потоком вместо страницы"
+        )
+
+
+class ProductSearch(BaseModel):
+    """
+    Модель query-параметров полнотекстового поиска товаров.
+    """
+
+    q: str = Field(min_length=1, max_length=100, description="Поисковый запрос")
+    category_id: int | None = Field(default=None, description="ID категории")
+    cursor: str | None = Field(
+        default=None, description="Курсор из next_cursor предыдущей страницы"
+        )
+    limit: int = Field(default=20, ge=1, le=100,
+                       description="Размер страницы (1-100)")
+
+
+class ProductPage(BaseModel):
+    """
+    Модель страницы товаров. next_cursor равен None на последней странице.
+    """
+
+    items: list[ProductExpanded] = Field(description="Товары на странице")
+    next_cursor: str | None = Field(
+        default=None, description="Курсор следующей страницы"
+        )
+
+
 class UserCreate(BaseModel):
     email: EmailStr = Field(description="Email пользователя")
     password: str = Field(min_length=8, description="Пароль (минимум 8 символов)")
@@ -104,12 +248,51 @@ class Review(BaseModel):
     user_id: int = Field(description="Идентификатор пользователя, оставившего отзыв")
     product_id: int = Field(description="Идентификатор товара")
     comment: str | None = Field(description="Текст отзыва")
-    comment_date: datetime = Field(description="Дата создания отзыва")
+    comment_date: UTCDateTime = Field(description="Дата создания отзыва")
     grade: int = Field(description="Оценка товара")
     is_active: bool = Field(description="Активность отзыва")
 
-    model_config = ConfigDict(
-        json_encoders={
-            datetime: lambda v: v.astimezone(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
-        }
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ReviewExpanded(Review):
+    """Отзыв со связанным товаром, если он запрошен через expand."""
+
+    product: Product | None = Field(
+        default=None, description="Товар отзыва (expand=product)"
+        )
+
+
+class OrderItemCreate(BaseModel):
+    product_id: int = Field(description="Идентификатор товара")
+    quantity: int = Field(ge=1, le=1000, description="Количество (1-1000)")
+
+
+class OrderCreate(BaseModel):
+    """
+    Модель создания заказа. Товары резервируются на
+    ORDER_RESERVATION_MINUTES минут до оплаты.
+    """
+
+    items: list[OrderItemCreate] = Field(
+        min_length=1, max_length=100, description="Позиции заказа (1-100)"
     )
+
+
+class OrderItem(BaseModel):
+    product_id: int = Field(description="Идентификатор товара")
+    quantity: int = Field(description="Количество")
+    unit_price: float = Field(description="Цена за единицу на момент заказа")
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class Order(BaseModel):
+    id: int = Field(description="Идентификатор заказа")
+    status: str = Field(description="reserved, paid, cancelled или expired")
+    total: float = Field(description="Сумма заказа")
+    created_at: datetime = Field(description="Дата создания")
+    expires_at: datetime = Field(description="Окончание резерва")
+    items: list[OrderItem] = Field(description="Позиции заказа")
+
+    model_config = ConfigDict(from_attributes=True)
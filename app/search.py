@@ -0,0 +1,54 @@
+"""
+Модуль с выражениями полнотекстового поиска товаров.
+
+Поиск идёт по сгенерированной колонке витрины каталога
+product_listings.search_vector (название с весом A и описание с весом B
+в конфигурациях russian и english) и GIN-индексу по ней. Каждое
+слово запроса ищется как префикс, что подходит для автодополнения.
+Если по словам ничего не найдено, используется нечёткий поиск
+по триграммам названия (pg_trgm).
+"""
+import re
+
+from sqlalchemy import ColumnElement, func, literal_column
+
+from app.models.product_listings import SEARCH_CONFIGS, ProductListing
+
+MAX_SEARCH_WORDS = 8
+
+WORD_RE = re.compile(r"\w+")
+
+
+def prefix_tsquery(text: str) -> ColumnElement | None:
+    """
+    Строит tsquery, в котором все слова запроса ищутся как префиксы.
+    В запрос попадают только буквенно-цифровые слова, поэтому
+    спецсимволы tsquery из пользовательского ввода не интерпретируются.
+    """
+    words = WORD_RE.findall(text.lower())[:MAX_SEARCH_WORDS]
+    if not words:
+        return None
+    expression = " & ".join(f"{word}:*" for word in words)
+    query = None
+    for config in SEARCH_CONFIGS:
+        config_query = func.to_tsquery(
+            literal_column(f"'{config}'::regconfig"), expression)
+        query = config_query if query is None else query.op("||")(config_query)
+    return query
+
+
+def fulltext_match(query: ColumnElement) -> ColumnElement[bool]:
+    return ProductListing.search_vector.op("@@")(query)
+
+
+def fulltext_rank(query: ColumnElement) -> ColumnElement[float]:
+    return func.ts_rank(ProductListing.search_vector, query)
+
+
+def trigram_match(text: str) -> ColumnElement[bool]:
+    """Нечёткое совпадение названия по порогу pg_trgm.similarity_threshold."""
+    return ProductListing.name.op("%")(text)
+
+
+def trigram_rank(text: str) -> ColumnElement[float]:
+    return func.similarity(ProductListing.name, text)
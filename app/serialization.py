@@ -0,0 +1,124 @@
+"""
+Модуль быстрой сериализации списков в ответах.
+
+Обработчики чтения выбирают из БД только колонки схемы ответа и отдают
+строки без построения ORM-объектов и моделей: RowSerializer один раз
+при импорте собирает по схеме TypeAdapter списка TypedDict, который
+сериализует словари в JSON в pydantic-core без валидации. Формат
+значений совпадает с обычным путём через response_model: даты отзывов
+приводятся к UTC с точностью до секунды ещё в SQL и сериализуются
+нативно как 2025-01-01T00:00:00Z.
+
+Связанные объекты (?expand=) передаются в элементах словарями полей
+своих схем под ключами, перечисленными в related.
+"""
+from collections.abc import Sequence
+from typing import Annotated, Any
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from pydantic.fields import FieldInfo
+from sqlalchemy import ColumnElement, func
+# pydantic на Python < 3.12 принимает только TypedDict из typing_extensions.
+from typing_extensions import NotRequired, TypedDict
+
+from app.models import Category as CategoryModel
+from app.models import ProductListing
+from app.models import Review as ReviewModel
+from app.models import User as UserModel
+from app.schemas import Category, Product, Review, Seller
+
+
+def field_type(field: FieldInfo) -> Any:
+    """Тип поля схемы вместе с его аннотациями (например, сериализаторами)."""
+    if field.metadata:
+        return Annotated[(field.annotation, *field.metadata)]
+    return field.annotation
+
+
+def row_type(schema: type[BaseModel]) -> type:
+    """TypedDict с полями схемы."""
+    return TypedDict(f"{schema.__name__}Row", {
+        name: field_type(field) for name, field in schema.model_fields.items()
+    })
+
+
+def json_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
+
+class RowSerializer:
+    """
+    Сериализатор строк запроса select(*columns) по схеме ответа.
+    expressions задают SQL-выражения для полей, которые не совпадают
+    с атрибутами модели. related — необязательные связанные объекты
+    элемента: имя ключа и схема.
+    """
+
+    def __init__(self, schema: type[BaseModel], entity: Any,
+                 related: dict[str, type[BaseModel]] | None = None,
+                 **expressions: ColumnElement):
+        self.fields = list(schema.model_fields)
+        self.columns = [
+            expressions.get(name, getattr(entity, name)).label(name)
+            for name in self.fields
+        ]
+        item_type = TypedDict(f"{schema.__name__}Item", {
+            **{name: field_type(field)
+               for name, field in schema.model_fields.items()},
+            **{name: NotRequired[row_type(related_schema) | None]
+               for name, related_schema in (related or {}).items()},
+        })
+        self.row = TypeAdapter(item_type)
+        self.rows = TypeAdapter(list[item_type])
+        self.page = TypeAdapter(TypedDict(f"{schema.__name__}PageRow", {
+            "items": list[item_type], "next_cursor": str | None,
+        }))
+
+    def to_dicts(self, rows: Sequence[Sequence]) -> list[dict]:
+        """
+        Словари полей схемы. Лишние колонки в конце строк (ключи курсора,
+        seller_id для expand) отбрасываются.
+        """
+        return [dict(zip(self.fields, row, strict=False)) for row in rows]
+
+    def object_dict(self, obj: Any) -> dict | None:
+        """Словарь полей схемы из атрибутов ORM-объекта или None."""
+        if obj is None:
+            return None
+        return {name: getattr(obj, name) for name in self.fields}
+
+    def dump(self, rows: Sequence[Sequence]) -> bytes:
+        return self.rows.dump_json(self.to_dicts(rows))
+
+    def dump_row(self, row: Sequence) -> bytes:
+        return self.row.dump_json(dict(zip(self.fields, row, strict=True)))
+
+    def response(self, rows: Sequence[Sequence]) -> Response:
+        return json_response(self.dump(rows))
+
+    def items_response(self, items: list[dict]) -> Response:
+        """Ответ из готовых словарей, например со связанными объектами."""
+        return json_response(self.rows.dump_json(items))
+
+    def page_response(self, rows: Sequence[Sequence],
+                      next_cursor: str | None) -> Response:
+        return self.items_page_response(self.to_dicts(rows), next_cursor)
+
+    def items_page_response(self, items: list[dict],
+                            next_cursor: str | None) -> Response:
+        return json_response(self.page.dump_json(
+            {"items": items, "next_cursor": next_cursor}))
+
+
+def utc_seconds(column: ColumnElement) -> ColumnElement:
+    """Наивная дата из БД как timestamptz в UTC с точностью до секунды."""
+    return func.timezone("UTC", func.date_trunc("second", column))
+
+
+product_rows = RowSerializer(Product, ProductListing,
+                             related={"category": Category, "seller": Seller})
+category_rows = RowSerializer(Category, CategoryModel)
+review_rows = RowSerializer(Review, ReviewModel, related={"product": Product},
+                            comment_date=utc_seconds(ReviewModel.comment_date))
+seller_rows = RowSerializer(Seller, UserModel)
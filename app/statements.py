@@ -0,0 +1,50 @@
+"""
+Модуль с заранее построенными запросами горячих путей.
+
+Запрос, собранный заново при каждом вызове, SQLAlchemy каждый раз
+обходит, чтобы построить ключ кэша компиляции. У запроса, созданного
+один раз на уровне модуля, ключ мемоизирован, поэтому вызов сводится
+к поиску в кэше компиляции, а одинаковый SQL позволяет asyncpg
+переиспользовать prepared statement соединения. Значения передаются
+именованными параметрами:
+
+    await db.scalar(ACTIVE_PRODUCT, {"id": product_id})
+
+Попадания в кэш компиляции считает метрика db_compiled_cache
+(см. app.database).
+"""
+from sqlalchemy import Select, bindparam, select
+
+from app.models import Category, Product, User
+
+ACTIVE_CATEGORY = select(Category).where(
+    Category.id == bindparam("id"), Category.is_active)
+
+ACTIVE_PRODUCT = select(Product).where(
+    Product.id == bindparam("id"), Product.is_active)
+
+ACTIVE_PRODUCT_WITH_CATEGORY_STATUS = select(Product, Category.is_active).join(
+    Category).where(Product.id == bindparam("id"), Product.is_active)
+
+ACTIVE_PRODUCT_SELLER_ID = select(Product.seller_id).where(
+    Product.id == bindparam("id"), Product.is_active)
+
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+
+ACTIVE_USER_BY_EMAIL = select(User).where(
+    User.email == bindparam("email"), User.is_active)
+
+USER_STATUS = select(User.is_active, User.token_version).where(
+    User.id == bindparam("id"))
+
+# Все запросы модуля с параметрами для прогрева при запуске воркера.
+HOT_STATEMENTS: dict[str, tuple[Select, dict]] = {
+    "active_category": (ACTIVE_CATEGORY, {"id": 0}),
+    "active_product": (ACTIVE_PRODUCT, {"id": 0}),
+    "active_product_with_category_status": (
+        ACTIVE_PRODUCT_WITH_CATEGORY_STATUS, {"id": 0}),
+    "active_product_seller_id": (ACTIVE_PRODUCT_SELLER_ID, {"id": 0}),
+    "user_by_email": (USER_BY_EMAIL, {"email": ""}),
+    "active_user_by_email": (ACTIVE_USER_BY_EMAIL, {"email": ""}),
+    "user_status": (USER_STATUS, {"id": 0}),
+}
@@ -0,0 +1,49 @@
+"""
+Модуль для потоковой отдачи больших списков.
+
+Строки читаются из БД серверным курсором пачками по STREAM_BATCH_SIZE,
+сериализуются по мере чтения и отправляются chunked-ответом, поэтому
+память воркера не зависит от размера выгрузки.
+"""
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from app.config import config
+from app.replicas import replicas
+from app.schemas import StreamFormat
+from app.serialization import RowSerializer
+
+MEDIA_TYPES = {"json": "application/json", "ndjson": "application/x-ndjson"}
+SEPARATORS = {"json": b",", "ndjson": b"\n"}
+
+
+def stream_response(stmt: Select, serializer: RowSerializer,
+                    stream_format: StreamFormat) -> StreamingResponse:
+    """
+    Отдаёт результат запроса select(*serializer.columns) JSON-массивом
+    или NDJSON.
+    Сессия открывается внутри генератора: сессия запроса к моменту
+    отправки тела ответа уже закрыта. Выгрузки читаются с реплик.
+    """
+    separator = SEPARATORS[stream_format]
+
+    async def body():
+        if stream_format == "json":
+            yield b"["
+        first = True
+        async with replicas.session() as session:
+            rows = await session.stream(
+                stmt.execution_options(yield_per=config.STREAM_BATCH_SIZE))
+            async for batch in rows.partitions():
+                if stream_format == "json":
+                    chunk = serializer.dump(batch)[1:-1]
+                else:
+                    chunk = separator.join(serializer.dump_row(row) for row in batch)
+                yield chunk if first else separator + chunk
+                first = False
+        if stream_format == "json":
+            yield b"]"
+        elif not first:
+            yield b"\n"
+
+    return StreamingResponse(body(), media_type=MEDIA_TYPES[stream_format])
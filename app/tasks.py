@@ -1,7 +1,150 @@
+"""
+Модуль с фоновыми задачами Celery.
+
+Задачи синхронные, а работа с БД асинхронная, поэтому каждая задача
+выполняет корутину в event loop, созданном один раз на процесс воркера:
+пул соединений и клиенты Redis остаются привязаны к одному loop.
+
+Планирование из обработчиков идёт через schedule_once: пока задача
+для ключа ожидает запуска, повторные вызовы не создают новых задач.
+В eager-режиме (CELERY_TASK_ALWAYS_EAGER) schedule_once ожидает корутину
+задачи прямо в event loop приложения: run_until_complete из уже
+работающего loop невозможен, а соединения пула привязаны к loop
+приложения.
+"""
+import asyncio
+import functools
+from collections.abc import Callable, Coroutine
+from datetime import datetime
+
+import redis.asyncio as redis
+from celery import Task
+from kombu.exceptions import OperationalError
+from loguru import logger
+from sqlalchemy import text
+
 from app.celery import celery
+from app.config import config
+from app.crud import reconcile_product_ratings, release_reserved_orders
+from app.database import async_session_maker
+from app.models.orders import Order
+from app.response_cache import invalidate
+
+worker_loop: asyncio.AbstractEventLoop | None = None
+
+# Ключи ожидающих задач хранятся в Redis брокера. С другим брокером
+# (например, memory:// в тестах) задачи ставятся без объединения.
+pending = (redis.from_url(config.CELERY_BROKER_URL)
+           if config.CELERY_BROKER_URL.startswith(("redis://", "rediss://"))
+           else None)
+
+
+# Корутины задач, объявленных через async_task, по имени задачи.
+task_coroutines: dict[str, Callable[..., Coroutine]] = {}
+
+
+def run_async(coro: Coroutine):
+    """Выполняет корутину в event loop процесса воркера."""
+    global worker_loop
+    if worker_loop is None:
+        worker_loop = asyncio.new_event_loop()
+    return worker_loop.run_until_complete(coro)
+
+
+def async_task(func: Callable[..., Coroutine]):
+    """
+    Регистрирует корутину как задачу Celery. Воркер выполняет её через
+    run_async, а schedule_once в eager-режиме ожидает её напрямую.
+    """
+    name = f"{__name__}.{func.__name__}"
+    task_coroutines[name] = func
+
+    @celery.task(name=name)
+    @functools.wraps(func)
+    def run(*args):
+        return run_async(func(*args))
+    return run
+
+
+async def schedule_once(key: str, task: Task, *args, countdown: int) -> None:
+    """
+    Ставит задачу с задержкой countdown, если для key задача ещё не
+    ожидает запуска. Задача снимает ключ в начале выполнения, поэтому
+    изменения, пришедшие во время её работы, запланируют ещё один запуск.
+    Недоступность брокера не ломает запрос: данные уже сохранены,
+    а расхождение исправит reconcile-ratings.
+    """
+    if celery.conf.task_always_eager:
+        try:
+            await task_coroutines[task.name](*args)
+        except Exception:
+            logger.exception(f"Task {task.name} failed")
+        return
+    try:
+        if pending is not None and not await pending.set(
+                f"pending:{key}", 1, nx=True, ex=countdown * 2 + 60):
+            return
+        # Публикация в брокер блокирующая, поэтому выполняется в потоке.
+        await asyncio.to_thread(task.apply_async, args=args,
+                                countdown=countdown)
+    except (redis.RedisError, OperationalError) as exc:
+        logger.warning(f"Failed to schedule {task.name}: {exc}")
+
+
+async def release(key: str) -> None:
+    if pending is not None:
+        await pending.delete(f"pending:{key}")
 
 
 @celery.task
 def call_background_task(message):
     print("Background Task called!")
     print(message)
+
+
+@async_task
+async def recompute_product_rating(product_id: int):
+    """Пересчитывает оценку товара и сбрасывает кэш ответов с товарами."""
+    await release(f"rating:{product_id}")
+    async with async_session_maker() as session:
+        updated = await reconcile_product_ratings(session, product_id)
+    if updated:
+        await invalidate("products")
+
+
+@async_task
+async def refresh_search_index():
+    """
+    Переносит накопленные записи из pending list GIN-индекса поиска
+    в основной индекс, чтобы поиск после массовых загрузок не замедлялся.
+    """
+    await release("search-index")
+    async with async_session_maker() as session:
+        await session.execute(text(
+            "SELECT gin_clean_pending_list("
+            "'ix_product_listings_search_vector'::regclass)"))
+        await session.commit()
+
+
+@async_task
+async def release_expired_reservations():
+    """
+    Возвращает на склад товар из заказов с истёкшим резервом
+    (celery beat).
+    """
+    async with async_session_maker() as session:
+        released = await release_reserved_orders(
+            session, "expired", Order.expires_at <= datetime.now())
+        await session.commit()
+    if released:
+        await invalidate("products")
+
+
+async def schedule_rating_recompute(product_id: int) -> None:
+    await schedule_once(f"rating:{product_id}", recompute_product_rating, product_id,
+                        countdown=config.RATING_RECOMPUTE_DELAY)
+
+
+async def schedule_search_refresh() -> None:
+    await schedule_once("search-index", refresh_search_index,
+                        countdown=config.SEARCH_REFRESH_DELAY)
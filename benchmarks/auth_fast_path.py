@@ -0,0 +1,78 @@
+"""
+Бенчмарк пропускной способности аутентифицированных запросов
+с быстрым путём аутентификации (config.AUTH_FAST_PATH) и без него.
+
+Запуск против настроенной базы данных:
+
+    python -m benchmarks.auth_fast_path --requests 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+from uuid import uuid4
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.auth import create_access_token, hash_password, token_claims, user_status_cache
+from app.config import config
+from app.database import async_session_maker
+from app.models.users import User
+from app.rbac import Buyer
+
+
+def build_app() -> FastAPI:
+    """Минимальное приложение, измеряющее только стоимость зависимости Buyer."""
+    bench_app = FastAPI()
+
+    @bench_app.get("/whoami")
+    async def whoami(user: Buyer):
+        return {"id": user.id}
+
+    return bench_app
+
+
+async def create_buyer() -> User:
+    async with async_session_maker() as session:
+        user = User(email=f"bench-{uuid4().hex}@example.com",
+                    hashed_password=hash_password("benchmark"), role="buyer")
+        session.add(user)
+        await session.commit()
+        return user
+
+
+async def run(client: AsyncClient, token: str, requests: int, concurrency: int) -> float:
+    """Выполняет запросы и возвращает достигнутое число запросов в секунду."""
+    headers = {"Authorization": f"Bearer {token}"}
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            response = await client.get("/whoami", headers=headers)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - start)
+
+
+async def main(requests: int, concurrency: int) -> None:
+    user = await create_buyer()
+    config.RATE_LIMIT_ENABLED = False
+    token = create_access_token(token_claims(user))
+    transport = ASGITransport(app=build_app())
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        for fast_path in (False, True):
+            config.AUTH_FAST_PATH = fast_path
+            user_status_cache.clear()
+            await run(client, token, min(requests, 100), concurrency)
+            rps = await run(client, token, requests, concurrency)
+            print(f"AUTH_FAST_PATH={fast_path}: {rps:.0f} req/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
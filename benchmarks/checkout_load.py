@@ -0,0 +1,93 @@
+"""
+Нагрузочный тест резервирования одного «горячего» товара.
+
+Создаёт товар с остатком --stock и --buyers покупателей, которые
+одновременно заказывают по одной единице. Проверяет, что успешных
+заказов ровно столько, сколько было товара, остаток не ушёл в минус,
+а остальные покупатели получили 409. Печатает пропускную способность
+и перцентили задержки.
+
+    python -m benchmarks.checkout_load --buyers 200 --stock 50
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from uuid import uuid4
+
+from httpx import ASGITransport, AsyncClient
+
+from app.auth import create_access_token, token_claims
+from app.crud import sync_product_listings
+from app.database import async_session_maker
+from app.main import app
+from app.models import Category, Product, User
+
+
+async def seed(buyers: int, stock: int) -> tuple[int, list[str]]:
+    suffix = uuid4().hex[:8]
+    async with async_session_maker() as session:
+        seller = User(email=f"load-seller-{suffix}@example.com",
+                      hashed_password="-", role="seller")
+        users = [User(email=f"load-buyer-{i}-{suffix}@example.com",
+                      hashed_password="-", role="buyer")
+                 for i in range(buyers)]
+        category = Category(name=f"Load {suffix}")
+        session.add_all([seller, category, *users])
+        await session.flush()
+        product = Product(name=f"Hot product {suffix}", price=100, stock=stock,
+                          category_id=category.id, seller_id=seller.id)
+        session.add(product)
+        await session.flush()
+        await sync_product_listings(session, Product.id == product.id)
+        await session.commit()
+    tokens = [create_access_token(token_claims(user)) for user in users]
+    return product.id, tokens
+
+
+async def main(buyers: int, stock: int) -> int:
+    product_id, tokens = await seed(buyers, stock)
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport,
+                           base_url="http://load") as client:
+        async def buy(token: str):
+            started = time.perf_counter()
+            response = await client.post(
+                "/orders/", headers={"Authorization": f"Bearer {token}"},
+                json={"items": [{"product_id": product_id, "quantity": 1}]})
+            latencies.append(time.perf_counter() - started)
+            code = response.status_code
+            statuses[code] = statuses.get(code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(buy(token) for token in tokens))
+        elapsed = time.perf_counter() - started
+
+    async with async_session_maker() as session:
+        remaining = (await session.get(Product, product_id)).stock
+
+    created = statuses.get(201, 0)
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"statuses: {statuses}")
+    print(f"stock: {stock} -> {remaining}, orders created: {created}")
+    print(f"throughput: {buyers / elapsed:.0f} req/s, "
+          f"p50 {percentiles[49] * 1000:.1f} ms, "
+          f"p95 {percentiles[94] * 1000:.1f} ms, "
+          f"p99 {percentiles[98] * 1000:.1f} ms")
+    oversold = (remaining < 0 or created != min(stock, buyers)
+                or remaining != stock - created)
+    if oversold:
+        print("FAIL: stock accounting is inconsistent")
+    return 1 if oversold else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--buyers", type=int, default=200)
+    parser.add_argument("--stock", type=int, default=50)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.buyers, args.stock)))
@@ -0,0 +1,140 @@
+"""
+Проверка планов запросов эндпоинтов на последовательное чтение таблиц.
+
+Скрипт создаёт данные в настроенной базе (benchmarks.query_budget.seed),
+вызывает эндпоинты приложения в процессе и перехватывает их SQL. Каждый
+запрос затем выполняется как EXPLAIN с enable_seqscan = off: если
+планировщик всё равно выбирает Seq Scan, подходящего индекса нет, и
+скрипт завершается с ненулевым кодом. Таблицы, которые эндпоинт
+читает целиком намеренно, перечисляются в full_scan.
+
+    alembic upgrade head && python -m benchmarks.explain_check
+"""
+import asyncio
+import json
+import sys
+from dataclasses import dataclass, field
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+
+from app.category_cache import category_cache
+from app.database import async_engine, replica_engines
+from app.main import app
+from benchmarks.query_budget import seed
+
+
+@dataclass
+class Check:
+    method: str
+    url: str
+    token: str = "buyer"
+    json: dict | None = None
+    # Таблицы, которые эндпоинт читает целиком.
+    full_scan: set[str] = field(default_factory=set)
+
+
+class StatementRecorder:
+    """Запоминает SQL и параметры запросов движка приложения."""
+
+    def __init__(self):
+        self.statements: list[tuple[str, tuple]] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            self.statements.append((statement, parameters))
+
+    def __enter__(self):
+        for engine in (async_engine, *replica_engines):
+            event.listen(engine.sync_engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        for engine in (async_engine, *replica_engines):
+            event.remove(engine.sync_engine, "before_cursor_execute", self)
+
+
+def checks(data: dict) -> list[Check]:
+    category_id, product_id = data["category_id"], data["product_id"]
+    product = {"name": "Explain product", "price": 12, "stock": 3,
+               "category_id": category_id}
+    return [
+        # Кэш категорий загружает все активные категории.
+        Check("GET", "/categories/", full_scan={"categories"}),
+        Check("GET", "/products/"),
+        Check("GET", "/products/?sort=-price"),
+        Check("GET", "/products/?sort=rating"),
+        Check("GET", f"/products/?category_id={category_id}&sort=-price"),
+        Check("GET", f"/products/?seller_id={data['seller_id']}"),
+        Check("GET", "/products/search?q=budget"),
+        Check("GET", "/products/search?q=bugdet"),
+        Check("GET", f"/products/category/{category_id}"),
+        Check("GET", f"/products/category/{category_id}"
+                     "?include_descendants=true"),
+        Check("GET", f"/products/{product_id}"),
+        Check("GET", f"/products/{product_id}/reviews"),
+        # Полный список отзывов.
+        Check("GET", "/reviews", full_scan={"reviews"}),
+        Check("PUT", f"/products/{product_id}", "seller", product),
+        Check("POST", "/reviews", "buyer",
+              {"product_id": product_id, "comment": "ok", "grade": 5}),
+        Check("POST", "/orders/", "buyer",
+              {"items": [{"product_id": product_id, "quantity": 1}]}),
+    ]
+
+
+def seq_scans(plan: dict) -> set[str]:
+    """Таблицы, которые читаются узлами Seq Scan плана."""
+    tables = set()
+    if plan["Node Type"] == "Seq Scan":
+        tables.add(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        tables |= seq_scans(child)
+    return tables
+
+
+async def explain(statement: str, parameters: tuple) -> set[str]:
+    async with async_engine.connect() as conn:
+        await conn.exec_driver_sql("SET enable_seqscan = off")
+        result = await conn.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        plan = result.scalar()
+        await conn.rollback()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return seq_scans(plan[0]["Plan"])
+
+
+async def main() -> int:
+    data = await seed()
+    async with async_engine.begin() as conn:
+        await conn.exec_driver_sql("ANALYZE")
+
+    failures = 0
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://explain") as client:
+        for check in checks(data):
+            await category_cache.invalidate()
+            # Запрос с токеном не попадает в кэш ответов.
+            headers = {"Authorization": f"Bearer {data['tokens'][check.token]}"}
+            with StatementRecorder() as recorder:
+                response = await client.request(
+                    check.method, check.url, headers=headers, json=check.json)
+            for statement, parameters in recorder.statements:
+                if not statement.lstrip().upper().startswith(
+                        ("SELECT", "UPDATE", "INSERT", "DELETE", "WITH")):
+                    continue
+                tables = await explain(statement, parameters) - check.full_scan
+                failures += bool(tables)
+                if tables:
+                    print(f"FAIL {check.method} {check.url}: "
+                          f"Seq Scan on {', '.join(sorted(tables))}\n  {statement}")
+            print(f"{'ok  ' if response.is_success else 'FAIL'} {check.method} "
+                  f"{check.url}: {len(recorder.statements)} queries, "
+                  f"status {response.status_code}")
+            failures += not response.is_success
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,343 @@
+"""
+Нагрузочный бенчмарк эндпоинтов приложения.
+
+Работает на данных benchmarks.seed_data. Каждый маршрут из app/routers
+нагружается отдельно заданным числом запросов с заданной
+конкурентностью. Для маршрута выводятся p50/p95/p99, req/s, доля ошибок
+и, в режиме приложения в процессе, число SQL-запросов на запрос.
+
+    # приложение в процессе (httpx + ASGITransport)
+    python -m benchmarks.load --requests 2000 --concurrency 32
+
+    # отдельный сервер: запускается скриптом или уже работает по --url
+    python -m benchmarks.load --serve gunicorn --workers 4
+    python -m benchmarks.load --url http://127.0.0.1:8000
+
+Результаты сохраняются в JSON (--save, например
+benchmarks/baselines/main.json) и сравниваются с ранее
+сохранённым базовым замером (--compare): если p95 или req/s ухудшились
+больше чем на --tolerance, либо выросло число запросов к БД, скрипт
+завершается с ненулевым кодом.
+
+Лимиты частоты запросов в процессе и для --serve отключаются, сервер
+по --url нужно запускать с RATE_LIMIT_ENABLED=false.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from httpx import ASGITransport, AsyncClient, HTTPError
+from sqlalchemy import select
+
+from app.auth import create_access_token, create_refresh_token, token_claims
+from app.config import config
+from app.database import async_session_maker
+from app.main import app
+from app.models import Category, Product, User
+from benchmarks.query_budget import QueryCounter
+from benchmarks.seed_data import BENCHMARK_PASSWORD, WORDS
+
+SAMPLE_SIZE = 1000
+
+
+@dataclass
+class Scenario:
+    """Маршрут и генератор аргументов client.request для него."""
+
+    route: str
+    request: Callable[[random.Random], dict]
+
+
+@dataclass
+class RouteResult:
+    route: str
+    requests: int
+    errors: int
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    queries_per_request: float | None = None
+    statuses: dict[str, int] = field(default_factory=dict)
+
+
+async def sample_data() -> dict:
+    """ID и токены из засеянной базы, на которых строятся запросы."""
+    async with async_session_maker() as session:
+        products = (await session.execute(
+            select(Product.id, Product.seller_id, Product.category_id)
+            .where(Product.is_active, Product.stock > 0)
+            .order_by(Product.id).limit(SAMPLE_SIZE))).all()
+        categories = list(await session.scalars(
+            select(Category.id).where(Category.is_active)
+            .order_by(Category.id).limit(SAMPLE_SIZE)))
+        buyers = list(await session.scalars(
+            select(User).where(User.role == "buyer", User.is_active)
+            .order_by(User.id).limit(SAMPLE_SIZE)))
+        if not products or not buyers:
+            raise SystemExit(
+                "База пуста: сначала запустите benchmarks.seed_data")
+        seller = await session.get(User, products[0].seller_id)
+    return {
+        "product_ids": [row.id for row in products],
+        "seller_product_ids": [row.id for row in products
+                               if row.seller_id == seller.id],
+        "product_categories": {row.id: row.category_id for row in products},
+        "category_ids": categories,
+        "seller_token": create_access_token(token_claims(seller)),
+        "buyer_emails": [buyer.email for buyer in buyers],
+        "buyer_tokens": [create_access_token(token_claims(buyer))
+                         for buyer in buyers],
+        "refresh_tokens": [create_refresh_token(token_claims(buyer))
+                           for buyer in buyers],
+    }
+
+
+def scenarios(data: dict, bypass_cache: bool) -> list[Scenario]:
+    """
+    Сценарии по маршрутам app/routers. GET /reviews не нагружается:
+    он отдаёт все отзывы без пагинации. Административные изменения
+    категорий тоже пропущены — каждое из них сбрасывает кэши.
+    """
+    product_ids, category_ids = data["product_ids"], data["category_ids"]
+
+    def auth(rng, token=None):
+        token = token or rng.choice(data["buyer_tokens"])
+        return {"Authorization": f"Bearer {token}"}
+
+    def anonymous(rng):
+        # Запрос с токеном минует кэш ответов.
+        return auth(rng) if bypass_cache else {}
+
+    def get(url: Callable[[random.Random], str]):
+        return lambda rng: {"method": "GET", "url": url(rng),
+                            "headers": anonymous(rng)}
+
+    def update_product(rng):
+        product_id = rng.choice(data["seller_product_ids"])
+        return {"method": "PUT", "url": f"/products/{product_id}",
+                "headers": auth(rng, data["seller_token"]),
+                "json": {"name": f"{rng.choice(WORDS)} {product_id}",
+                         "price": round(rng.uniform(1, 10_000), 2),
+                         "stock": 100,
+                         "category_id":
+                             data["product_categories"][product_id]}}
+
+    def list_products(rng):
+        url = f"/products/?sort={rng.choice(['id', '-price', 'rating'])}"
+        if rng.random() < 0.5:
+            url += f"&category_id={rng.choice(category_ids)}"
+        return url
+
+    return [
+        Scenario("GET /categories/", get(lambda rng: "/categories/")),
+        Scenario("GET /categories/tree", get(lambda rng: "/categories/tree")),
+        Scenario("GET /products/", get(list_products)),
+        Scenario("GET /products/search", get(lambda rng: (
+            f"/products/search?q={rng.choice(WORDS)}"))),
+        Scenario("GET /products/category/{category_id}", get(lambda rng: (
+            f"/products/category/{rng.choice(category_ids)}"))),
+        Scenario("GET /products/{product_id}", get(lambda rng: (
+            f"/products/{rng.choice(product_ids)}"))),
+        Scenario("GET /products/{product_id}/reviews", get(lambda rng: (
+            f"/products/{rng.choice(product_ids)}/reviews"))),
+        Scenario("PUT /products/{product_id}", update_product),
+        Scenario("POST /orders/", lambda rng: {
+            "method": "POST", "url": "/orders/", "headers": auth(rng),
+            "json": {"items": [{"product_id": rng.choice(product_ids),
+                                "quantity": 1}]}}),
+        Scenario("POST /users/token", lambda rng: {
+            "method": "POST", "url": "/users/token",
+            "data": {"username": rng.choice(data["buyer_emails"]),
+                     "password": BENCHMARK_PASSWORD}}),
+        Scenario("POST /users/refresh-token", lambda rng: {
+            "method": "POST", "url": "/users/refresh-token",
+            "json": rng.choice(data["refresh_tokens"])}),
+    ]
+
+
+def percentile(values: list[float], n: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[n - 1]
+
+
+async def run_scenario(client: AsyncClient, scenario: Scenario, requests: int,
+                       concurrency: int, seed: int,
+                       count_queries: bool) -> RouteResult:
+    rng = random.Random(f"{seed}:{scenario.route}")
+    prepared = [scenario.request(rng) for _ in range(requests)]
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+
+    async def worker():
+        while prepared:
+            kwargs = prepared.pop()
+            started = time.perf_counter()
+            try:
+                status = str((await client.request(**kwargs)).status_code)
+            except HTTPError as error:
+                status = type(error).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    with QueryCounter() as counter:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    errors = sum(count for status, count in statuses.items()
+                 if not status.isdigit() or int(status) >= 500)
+    return RouteResult(
+        route=scenario.route,
+        requests=requests,
+        errors=errors,
+        rps=round(requests / elapsed, 1),
+        p50_ms=round(percentile(latencies, 50) * 1000, 2),
+        p95_ms=round(percentile(latencies, 95) * 1000, 2),
+        p99_ms=round(percentile(latencies, 99) * 1000, 2),
+        queries_per_request=(round(counter.count / requests, 2)
+                             if count_queries else None),
+        statuses=statuses,
+    )
+
+
+def start_server(kind: str, workers: int, port: int) -> subprocess.Popen:
+    if kind == "uvicorn":
+        command = ["uvicorn", "app.main:app", "--port", str(port),
+                   "--workers", str(workers), "--log-level", "warning"]
+    else:
+        command = ["gunicorn", "app.main:app",
+                   "-k", "uvicorn.workers.UvicornWorker",
+                   "-w", str(workers), "-b", f"127.0.0.1:{port}",
+                   "--config", "python:app.gunicorn_conf"]
+    return subprocess.Popen([sys.executable, "-m", *command],
+                            env={**os.environ, "RATE_LIMIT_ENABLED": "false"})
+
+
+async def wait_ready(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with AsyncClient(base_url=url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health/ready")).is_success:
+                    return
+            except HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise SystemExit(f"Сервер {url} не ответил за {timeout:.0f} с")
+
+
+def compare(results: list[RouteResult], baseline_path: Path,
+            tolerance: float) -> int:
+    """Печатает отличия от базового замера и возвращает число регрессий."""
+    baseline = {route["route"]: route
+                for route in json.loads(baseline_path.read_text())["routes"]}
+    regressions = 0
+    for result in results:
+        base = baseline.get(result.route)
+        if base is None:
+            continue
+        problems = []
+        if result.p95_ms > base["p95_ms"] * (1 + tolerance):
+            problems.append(f"p95 {base['p95_ms']} -> {result.p95_ms} ms")
+        if result.rps < base["rps"] * (1 - tolerance):
+            problems.append(f"req/s {base['rps']} -> {result.rps}")
+        if (result.queries_per_request is not None
+                and base.get("queries_per_request") is not None
+                and result.queries_per_request > base["queries_per_request"]):
+            problems.append(f"queries {base['queries_per_request']} -> "
+                            f"{result.queries_per_request}")
+        regressions += bool(problems)
+        if problems:
+            print(f"REGRESSION {result.route}: {'; '.join(problems)}")
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    data = await sample_data()
+    config.RATE_LIMIT_ENABLED = False
+    server = None
+    if args.serve:
+        args.url = f"http://127.0.0.1:{args.port}"
+        server = start_server(args.serve, args.workers, args.port)
+    try:
+        if args.url:
+            await wait_ready(args.url)
+            client = AsyncClient(base_url=args.url, timeout=60)
+        else:
+            client = AsyncClient(transport=ASGITransport(app=app),
+                                 base_url="http://bench", timeout=60)
+        async with client:
+            results = []
+            for scenario in scenarios(data, args.bypass_cache):
+                if args.route and not any(part in scenario.route
+                                          for part in args.route):
+                    continue
+                result = await run_scenario(client, scenario, args.requests,
+                                            args.concurrency, args.seed,
+                                            count_queries=not args.url)
+                results.append(result)
+                queries = ("" if result.queries_per_request is None
+                           else f", {result.queries_per_request} q/req")
+                print(f"{result.route:40} {result.rps:8.1f} req/s  "
+                      f"p50 {result.p50_ms:7.2f}  p95 {result.p95_ms:7.2f}  "
+                      f"p99 {result.p99_ms:7.2f} ms{queries}, "
+                      f"errors {result.errors}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps({
+            "meta": {"created_at":
+                         datetime.now().isoformat(timespec="seconds"),
+                     "target": args.serve or args.url or "in-process",
+                     "workers": args.workers if args.serve else None,
+                     "requests": args.requests,
+                     "concurrency": args.concurrency,
+                     "bypass_cache": args.bypass_cache,
+                     "seed": args.seed,
+                     "python": platform.python_version()},
+            "routes": [asdict(result) for result in results],
+        }, ensure_ascii=False, indent=2))
+    failures = sum(result.errors > 0 for result in results)
+    if args.compare:
+        failures += compare(results, args.compare, args.tolerance)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000,
+                        help="число запросов на маршрут")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--route", action="append",
+                        help="нагружать только маршруты, содержащие подстроку")
+    parser.add_argument("--url", help="адрес уже запущенного сервера")
+    parser.add_argument("--serve", choices=["uvicorn", "gunicorn"],
+                        help="запустить сервер для замера")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--bypass-cache", action="store_true",
+                        help="отправлять GET с токеном, минуя кэш ответов")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", type=Path,
+                        help="сохранить результаты в JSON")
+    parser.add_argument("--compare", type=Path,
+                        help="базовый замер для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,96 @@
+"""
+Микробенчмарк накладных расходов access-лога на маршруте /products/.
+
+Сравнивает прежнюю реализацию на BaseHTTPMiddleware с чистым ASGI
+LogMiddleware из app.log. Обработчик /products/ возвращает заранее
+подготовленную страницу товаров, поэтому база данных не нужна
+и измеряется только стоимость middleware.
+
+    python -m benchmarks.log_middleware --requests 20000
+"""
+import argparse
+import asyncio
+import time
+from uuid import uuid4
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from httpx import ASGITransport, AsyncClient
+from loguru import logger
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.log import LogMiddleware
+
+PAGE = {
+    "items": [
+        {"id": i, "name": f"Product {i}", "description": None, "price": 10.0,
+         "image_url": None, "stock": 5, "category_id": 1, "is_active": True,
+         "rating": 4.5}
+        for i in range(20)
+    ],
+    "next_cursor": None,
+}
+
+
+class BaseHTTPLogMiddleware(BaseHTTPMiddleware):
+    """Прежняя реализация LogMiddleware, оставленная для сравнения."""
+
+    async def dispatch(self, request: Request, call_next):
+        log_id = str(uuid4())
+        with logger.contextualize(log_id=log_id):
+            try:
+                response = await call_next(request)
+                if response.status_code in [401, 402, 403, 404]:
+                    logger.warning(f"Request to {request.url.path} failed")
+                else:
+                    logger.info("Successfully accessed " + request.url.path)
+            except Exception as exc:
+                logger.error(f"Request to {request.url.path} failed: {exc}")
+                response = JSONResponse(content={"success": False}, status_code=500)
+            return response
+
+
+def build_app(middleware: type | None) -> FastAPI:
+    bench_app = FastAPI()
+    if middleware is not None:
+        bench_app.add_middleware(middleware)
+
+    @bench_app.get("/products/")
+    async def get_all_products():
+        return PAGE
+
+    return bench_app
+
+
+async def measure(middleware: type | None, requests: int, concurrency: int) -> float:
+    """Возвращает достигнутое число запросов в секунду."""
+    transport = ASGITransport(app=build_app(middleware))
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        remaining = iter(range(requests))
+
+        async def worker():
+            for _ in remaining:
+                (await client.get("/products/")).raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - start)
+
+
+async def main(requests: int, concurrency: int) -> None:
+    # Логи пишутся только в файл, чтобы вывод в консоль не искажал замер.
+    logger.remove(0)
+    for name, middleware in (("no middleware", None),
+                             ("BaseHTTPMiddleware", BaseHTTPLogMiddleware),
+                             ("pure ASGI", LogMiddleware)):
+        await measure(middleware, min(requests, 500), concurrency)
+        rps = await measure(middleware, requests, concurrency)
+        print(f"{name}: {rps:.0f} req/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,59 @@
+"""
+Счётчик SQL-запросов и тестовые данные для проверки бюджетов запросов.
+
+Бюджеты эндпоинтов проверяются в tests/test_query_budget.py, счётчик
+также использует нагрузочный тест (benchmarks.load), а данные —
+benchmarks.explain_check.
+"""
+from uuid import uuid4
+
+from sqlalchemy import event
+
+from app.auth import create_access_token, token_claims
+from app.crud import sync_product_listings
+from app.database import async_engine, async_session_maker, replica_engines
+from app.models import Category, Product, User
+
+
+class QueryCounter:
+    """Считает запросы к БД, выполненные движком приложения."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        for engine in (async_engine, *replica_engines):
+            event.listen(engine.sync_engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        for engine in (async_engine, *replica_engines):
+            event.remove(engine.sync_engine, "before_cursor_execute", self)
+
+
+async def seed() -> dict:
+    """Создаёт данные, на которых проверяются эндпоинты."""
+    suffix = uuid4().hex[:8]
+    async with async_session_maker() as session:
+        users = {
+            role: User(email=f"budget-{role}-{suffix}@example.com",
+                       hashed_password="-", role=role)
+            for role in ("seller", "buyer", "admin")
+        }
+        category = Category(name=f"Budget {suffix}")
+        session.add_all([*users.values(), category])
+        await session.flush()
+        product = Product(name=f"Budget product {suffix}", price=10, stock=5,
+                          category_id=category.id,
+                          seller_id=users["seller"].id)
+        session.add(product)
+        await session.flush()
+        await sync_product_listings(session, Product.id == product.id)
+        await session.commit()
+    tokens = {role: create_access_token(token_claims(user))
+              for role, user in users.items()}
+    return {"tokens": tokens, "category_id": category.id,
+            "product_id": product.id, "seller_id": users["seller"].id}
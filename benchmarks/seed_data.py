@@ -0,0 +1,174 @@
+"""
+Детерминированный генератор данных для бенчмарков.
+
+Заполняет настроенную базу деревом категорий заданной глубины,
+продавцами, покупателями, товарами и отзывами. Один и тот же --seed
+даёт одни и те же данные, поэтому замеры разных версий кода
+сравнимы между собой. Строки загружаются через COPY пачками,
+после чего пересчитываются оценки товаров, витрина каталога
+и статистика таблиц.
+
+    alembic upgrade head
+    python -m benchmarks.seed_data --products 1000000 --reviews 10000000 \\
+        --levels 5 --fanout 4 --truncate
+
+Все пользователи получают пароль BENCHMARK_PASSWORD, почта покупателей —
+buyer-<n>@bench.local, продавцов — seller-<n>@bench.local.
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from app.auth import hash_password
+from app.crud import reconcile_product_ratings, sync_product_listings
+from app.database import async_engine, async_session_maker
+
+BENCHMARK_PASSWORD = "benchmark"
+COPY_BATCH_SIZE = 50_000
+WORDS = ("смартфон", "ноутбук", "чайник", "кофе", "лампа", "кресло", "рюкзак",
+         "phone", "laptop", "kettle", "coffee", "lamp", "chair", "backpack",
+         "красный", "чёрный", "mini", "pro", "max", "eco", "classic", "smart")
+
+
+@dataclass
+class Volumes:
+    products: int
+    reviews: int
+    buyers: int
+    sellers: int
+    levels: int
+    fanout: int
+
+
+def category_rows(levels: int, fanout: int) -> tuple[list[tuple], list[int]]:
+    """Строки полного дерева категорий и ID его листьев."""
+    rows, level, next_id = [], [None], 1
+    for depth in range(levels):
+        children = []
+        for parent_id in level:
+            for _ in range(fanout):
+                rows.append((next_id, f"Категория {depth + 1}.{next_id}",
+                             parent_id, True))
+                children.append(next_id)
+                next_id += 1
+        level = children
+    return rows, level
+
+
+def user_rows(volumes: Volumes, hashed_password: str) -> Iterator[tuple]:
+    for n in range(1, volumes.sellers + 1):
+        yield n, f"seller-{n}@bench.local", hashed_password, True, "seller", 0
+    for n in range(1, volumes.buyers + 1):
+        yield (volumes.sellers + n, f"buyer-{n}@bench.local", hashed_password,
+               True, "buyer", 0)
+
+
+def product_rows(volumes: Volumes, leaves: list[int],
+                 rng: random.Random) -> Iterator[tuple]:
+    for product_id in range(1, volumes.products + 1):
+        name = " ".join(rng.choices(WORDS, k=3)) + f" {product_id}"
+        yield (product_id, name, f"SKU-{product_id}",
+               f"Описание товара {name}",
+               round(rng.uniform(1, 10_000), 2), None,
+               0 if rng.random() < 0.1 else rng.randint(1, 500),
+               rng.random() > 0.05, None, 0, 0,
+               rng.choice(leaves), rng.randint(1, volumes.sellers))
+
+
+def review_rows(volumes: Volumes, rng: random.Random) -> Iterator[tuple]:
+    """
+    Отзывы распределяются по товарам равномерно. Авторы отзывов к одному
+    товару идут подряд по кругу покупателей, поэтому пары
+    (user_id, product_id) не повторяются.
+    """
+    per_product, extra = divmod(volumes.reviews, volumes.products)
+    started = datetime(2025, 1, 1)
+    review_id = 0
+    for product_id in range(1, volumes.products + 1):
+        offset = rng.randrange(volumes.buyers)
+        count = min(per_product + (product_id <= extra), volumes.buyers)
+        for n in range(count):
+            review_id += 1
+            user_id = volumes.sellers + 1 + (offset + n) % volumes.buyers
+            yield (review_id, user_id, product_id, f"Отзыв {review_id}",
+                   started + timedelta(minutes=review_id % 525_600),
+                   rng.randint(1, 5), True)
+
+
+async def copy_rows(table: str, columns: list[str], rows) -> int:
+    """Загружает строки в таблицу через COPY пачками по COPY_BATCH_SIZE."""
+    total = 0
+    rows = iter(rows)
+    async with async_engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        while batch := list(itertools.islice(rows, COPY_BATCH_SIZE)):
+            await raw.driver_connection.copy_records_to_table(
+                table, records=batch, columns=columns)
+            total += len(batch)
+        await conn.commit()
+    return total
+
+
+async def seed(volumes: Volumes, seed: int, truncate: bool) -> None:
+    rng = random.Random(seed)
+    async with async_engine.begin() as conn:
+        if truncate:
+            await conn.exec_driver_sql(
+                "TRUNCATE order_items, orders, reviews, products, categories, "
+                "users RESTART IDENTITY CASCADE")
+
+    categories, leaves = category_rows(volumes.levels, volumes.fanout)
+    steps = [
+        ("users", ["id", "email", "hashed_password", "is_active", "role",
+                   "token_version"],
+         user_rows(volumes, hash_password(BENCHMARK_PASSWORD))),
+        ("categories", ["id", "name", "parent_id", "is_active"], categories),
+        ("products", ["id", "name", "sku", "description", "price",
+                      "image_url", "stock", "is_active", "rating",
+                      "rating_sum", "rating_count", "category_id",
+                      "seller_id"],
+         product_rows(volumes, leaves, rng)),
+        ("reviews", ["id", "user_id", "product_id", "comment", "comment_date",
+                     "grade", "is_active"],
+         review_rows(volumes, rng)),
+    ]
+    for table, columns, rows in steps:
+        started = time.perf_counter()
+        count = await copy_rows(table, columns, rows)
+        print(f"{table}: {count} rows in {time.perf_counter() - started:.1f}s")
+
+    async with async_engine.begin() as conn:
+        for table, *_ in steps:
+            await conn.exec_driver_sql(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"coalesce(max(id), 1)) FROM {table}")
+    async with async_session_maker() as session:
+        updated = await reconcile_product_ratings(session)
+        print(f"ratings: {updated} products updated")
+        await sync_product_listings(session)
+        await session.commit()
+    async with async_engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.exec_driver_sql("VACUUM ANALYZE")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--reviews", type=int, default=1_000_000)
+    parser.add_argument("--buyers", type=int, default=10_000)
+    parser.add_argument("--sellers", type=int, default=100)
+    parser.add_argument("--levels", type=int, default=5)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true",
+                        help="очистить таблицы перед загрузкой")
+    args = parser.parse_args()
+    asyncio.run(seed(Volumes(args.products, args.reviews, args.buyers,
+                             args.sellers, args.levels, args.fanout),
+                     args.seed, args.truncate))
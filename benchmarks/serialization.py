@@ -0,0 +1,130 @@
+"""
+Бенчмарк сериализации списков в ответах.
+
+Сравнивает стоимость сериализации 10 000 строк в прежнем пути FastAPI
+(валидация объектов через from_attributes по response_model,
+сериализация в Python-объекты и json.dumps, для отзывов — с
+json_encoders) и в пути app.serialization (кортежи колонок, словари
+и TypeAdapter.dump_json). Работает без БД на синтетических строках:
+построение ORM-объектов, которого новый путь тоже избегает, в замер
+не входит, его вклад виден в benchmarks.load.
+
+    python -m benchmarks.serialization --rows 10000 --repeat 20
+
+Перед замером проверяется, что оба пути дают одинаковые байты.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+
+from app.schemas import Product
+from app.serialization import RowSerializer, product_rows, review_rows
+
+PER_ROWS = 10_000
+
+
+class LegacyReview(BaseModel):
+    """Схема отзыва до перехода на нативный формат дат."""
+
+    id: int
+    user_id: int
+    product_id: int
+    comment: str | None
+    comment_date: datetime
+    grade: int
+    is_active: bool
+
+    model_config = ConfigDict(
+        json_encoders={
+            datetime: lambda v: v.astimezone(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+        }
+    )
+
+
+def product_values(rng: random.Random, n: int) -> dict:
+    return {"id": n, "name": f"Товар {n}", "description": f"Описание товара {n}",
+            "price": round(rng.uniform(1, 10_000), 2), "image_url": None,
+            "stock": rng.randint(0, 500), "category_id": rng.randint(1, 1000),
+            "is_active": True, "rating": round(rng.uniform(1, 5), 2),
+            "sku": f"SKU-{n}"}
+
+
+def review_values(rng: random.Random, n: int) -> dict:
+    started = datetime(2025, 1, 1)
+    return {"id": n, "user_id": rng.randint(1, 10_000),
+            "product_id": rng.randint(1, 100_000), "comment": f"Отзыв {n}",
+            "comment_date": started + timedelta(seconds=rng.randrange(10**8),
+                                                microseconds=rng.randrange(10**6)),
+            "grade": rng.randint(1, 5), "is_active": True}
+
+
+def as_db_row(values: dict) -> tuple:
+    """Кортеж, который вернул бы запрос select(*serializer.columns)."""
+    comment_date = values.get("comment_date")
+    if comment_date is not None:
+        values = {**values,
+                  "comment_date": comment_date.replace(tzinfo=UTC, microsecond=0)}
+    return tuple(values.values())
+
+
+def legacy_dump(schema: type[BaseModel]) -> Callable[[list], bytes]:
+    """Прежний путь: response_model=list[schema] и JSONResponse."""
+    adapter = TypeAdapter(list[schema])
+
+    def dump(objects: list) -> bytes:
+        validated = adapter.validate_python(objects, from_attributes=True)
+        content = adapter.dump_python(validated, mode="json")
+        return json.dumps(content, ensure_ascii=False, allow_nan=False,
+                          indent=None, separators=(",", ":")).encode()
+
+    return dump
+
+
+def measure(dump: Callable[[list], bytes], rows: list, repeat: int) -> float:
+    """Медиана времени сериализации в миллисекундах на PER_ROWS строк."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        dump(rows)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000 * PER_ROWS / len(rows)
+
+
+def compare(name: str, schema: type[BaseModel], serializer: RowSerializer,
+            make_values: Callable, rows: int, repeat: int, seed: int) -> None:
+    rng = random.Random(seed)
+    values = [make_values(rng, n) for n in range(1, rows + 1)]
+    objects = [SimpleNamespace(**row) for row in values]
+    db_rows = [as_db_row(row) for row in values]
+
+    before, after = legacy_dump(schema), serializer.dump
+    if before(objects) != after(db_rows):
+        raise SystemExit(f"{name}: legacy and fast serialization differ")
+
+    before_ms = measure(before, objects, repeat)
+    after_ms = measure(after, db_rows, repeat)
+    print(f"{name:<10} before {before_ms:8.1f} ms  after {after_ms:8.1f} ms  "
+          f"x{before_ms / after_ms:.1f}  (per {PER_ROWS} rows)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=PER_ROWS)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    # Наивные даты в БД записаны в часовом поясе сервера — UTC.
+    os.environ["TZ"] = "UTC"
+    time.tzset()
+    compare("products", Product, product_rows, product_values,
+            args.rows, args.repeat, args.seed)
+    compare("reviews", LegacyReview, review_rows, review_values,
+            args.rows, args.repeat, args.seed)
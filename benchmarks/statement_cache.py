@@ -0,0 +1,107 @@
+"""
+Микробенчмарк накладных расходов на запрос в горячих CRUD-хелперах.
+
+Сравнивает запрос, собираемый select(...).where(...) при каждом вызове,
+с заранее построенным запросом из app.statements. Без БД измеряется
+только сборка запроса и построение ключа кэша компиляции, то есть ровно
+то, что app.statements убирает из каждого вызова:
+
+    python -m benchmarks.statement_cache --calls 100000
+
+С --db те же запросы выполняются через сессию на настроенной базе
+данных, и кроме времени вызова выводится доля попаданий в кэш
+компиляции SQLAlchemy:
+
+    python -m benchmarks.statement_cache --db --calls 5000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+from collections.abc import Callable
+
+from sqlalchemy import Select, event, select
+
+from app.database import async_engine, async_session_maker
+from app.models import Category, Product, User
+from app.statements import (
+    ACTIVE_CATEGORY,
+    ACTIVE_PRODUCT,
+    ACTIVE_PRODUCT_WITH_CATEGORY_STATUS,
+    ACTIVE_USER_BY_EMAIL,
+)
+
+# Имя -> (сборка запроса при каждом вызове, готовый запрос, параметры).
+CASES: dict[str, tuple[Callable[[], Select], Select, dict]] = {
+    "get_category_or_404": (
+        lambda: select(Category).where(Category.id == 1, Category.is_active),
+        ACTIVE_CATEGORY, {"id": 1}),
+    "get_product_or_404": (
+        lambda: select(Product).where(Product.id == 1, Product.is_active),
+        ACTIVE_PRODUCT, {"id": 1}),
+    "get_product_with_category_or_404": (
+        lambda: select(Product, Category.is_active).join(Category).where(
+            Product.id == 1, Product.is_active),
+        ACTIVE_PRODUCT_WITH_CATEGORY_STATUS, {"id": 1}),
+    "get_current_user": (
+        lambda: select(User).where(User.email == "bench@example.com", User.is_active),
+        ACTIVE_USER_BY_EMAIL, {"email": "bench@example.com"}),
+}
+
+
+def measure(func: Callable[[], object], calls: int, repeat: int = 5) -> float:
+    """Медиана времени одного вызова в микросекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(calls):
+            func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) / calls * 1_000_000
+
+
+def run_offline(calls: int) -> None:
+    for name, (build, prebuilt, _) in CASES.items():
+        before = measure(lambda build=build: build()._generate_cache_key(), calls)
+        after = measure(lambda prebuilt=prebuilt: prebuilt._generate_cache_key(), calls)
+        print(f"{name:<34} inline {before:7.2f} us  prebuilt {after:7.2f} us")
+
+
+async def run_db(calls: int) -> None:
+    results = Counter()
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        results[context.cache_hit.name.lower()] += 1
+
+    event.listen(async_engine.sync_engine, "after_cursor_execute", count)
+    async with async_session_maker() as session:
+        for name, (build, prebuilt, params) in CASES.items():
+            line = f"{name:<34}"
+            for label, execute in (
+                    ("inline", lambda build=build: session.execute(build())),
+                    ("prebuilt", lambda prebuilt=prebuilt, params=params:
+                        session.execute(prebuilt, params))):
+                await execute()
+                results.clear()
+                started = time.perf_counter()
+                for _ in range(calls):
+                    await execute()
+                per_call = (time.perf_counter() - started) / calls * 1_000_000
+                hits = results["cache_hit"] / max(sum(results.values()), 1)
+                line += f" {label} {per_call:7.1f} us (cache hits {hits:.0%})"
+            print(line)
+    event.remove(async_engine.sync_engine, "after_cursor_execute", count)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--db", action="store_true",
+                        help="выполнять запросы на настроенной базе данных")
+    args = parser.parse_args()
+    if args.db:
+        asyncio.run(run_db(args.calls))
+    else:
+        run_offline(args.calls)
@@ -0,0 +1,14 @@
+"""
+Проверка, что приложение собирается на версии Python из Dockerfile.prod.
+
+Ошибки схем pydantic и маршрутов FastAPI возникают при импорте app.main,
+а не при компиляции модулей.
+"""
+import importlib
+
+
+def test_app_imports():
+    main = importlib.import_module("app.main")
+    paths = {route.path for route in main.app.routes}
+    assert "/health/ready" in paths
+    assert "/products" in paths or "/products/" in paths
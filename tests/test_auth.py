@@ -0,0 +1,47 @@
+"""Тесты отзыва токенов на быстром пути аутентификации (app.auth)."""
+import asyncio
+
+import fakeredis
+import redis.asyncio as redis
+
+from app.auth import RevocationListener, user_status_cache
+
+
+async def wait_until(condition, timeout: float = 1.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+def test_revocation_drops_only_revoked_user():
+    async def run():
+        server = fakeredis.FakeServer()
+        listener = RevocationListener(fakeredis.FakeAsyncRedis(server=server))
+        publisher = RevocationListener(fakeredis.FakeAsyncRedis(server=server))
+        listener.start()
+        try:
+            # Подписка сбрасывает кэш: ждём её, затем заполняем кэш.
+            user_status_cache.set("marker", True)
+            await wait_until(lambda: user_status_cache.get("marker") is None)
+            user_status_cache.set(1, (True, 0))
+            user_status_cache.set(2, (True, 0))
+            await publisher.publish(1)
+            await wait_until(lambda: user_status_cache.get(1) is None)
+            assert user_status_cache.get(2) == (True, 0)
+        finally:
+            await listener.stop()
+            user_status_cache.clear()
+
+    asyncio.run(run())
+
+
+def test_publish_without_redis_is_noop():
+    asyncio.run(RevocationListener(None).publish(1))
+
+
+def test_publish_logs_redis_errors():
+    class Unavailable:
+        async def publish(self, channel, message):
+            raise redis.ConnectionError("connection refused")
+
+    asyncio.run(RevocationListener(Unavailable()).publish(1))
@@ -0,0 +1,78 @@
+"""Тесты записи пачек массовой загрузки товаров (app.bulk_import)."""
+import asyncio
+
+from sqlalchemy.exc import DBAPIError
+
+from app import bulk_import
+from app.bulk_import import UPSERT_COLUMNS, BulkImport
+
+
+class FakeSession:
+    """Сессия, в которой активна категория 1, а upsert падает по запросу."""
+
+    def __init__(self, fail_upsert: bool):
+        self.fail_upsert = fail_upsert
+        self.commits = 0
+        self.rollbacks = 0
+        self.calls = 0
+
+    async def scalars(self, stmt, *args):
+        self.calls += 1
+        if self.calls == 1:
+            return [1]
+        if self.fail_upsert:
+            raise DBAPIError("INSERT", {}, Exception(
+                "numeric field overflow\nDETAIL: precision 10"))
+        return [100, 101]
+
+    async def execute(self, stmt, *args):
+        pass
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+def record(sku: str, category_id: int = 1) -> dict:
+    return {"name": f"Product {sku}", "price": "10", "stock": "1",
+            "category_id": category_id, "sku": sku}
+
+
+def run_import(db: FakeSession, records: list[dict]) -> BulkImport:
+    bulk = BulkImport(db, seller_id=7)
+
+    async def run():
+        for row, item in enumerate(records, 1):
+            await bulk.add(row, item)
+        await bulk.flush()
+
+    asyncio.run(run())
+    return bulk
+
+
+def test_upsert_reactivates_soft_deleted_products():
+    assert "is_active" in UPSERT_COLUMNS
+
+
+def test_rejected_batch_is_reported_and_rolled_back():
+    db = FakeSession(fail_upsert=True)
+    bulk = run_import(db, [record("a"), record("b"), record("c", 2)])
+    assert (db.commits, db.rollbacks) == (0, 1)
+    assert bulk.upserted == 0
+    assert bulk.failed == 3
+    assert [error.row for error in bulk.errors] == [3, 1, 2]
+    assert bulk.errors[1].errors == [
+        "Batch rejected by database: numeric field overflow"]
+
+
+def test_next_batch_continues_after_rejected_one(monkeypatch):
+    monkeypatch.setattr(bulk_import.config, "BULK_BATCH_SIZE", 2)
+    db = FakeSession(fail_upsert=True)
+    bulk = run_import(db, [record("a"), record("b")])
+    db.fail_upsert, db.calls = False, 0
+    asyncio.run(bulk.add(3, record("c")))
+    asyncio.run(bulk.add(4, record("d")))
+    assert (db.commits, db.rollbacks) == (1, 1)
+    assert (bulk.upserted, bulk.failed) == (2, 2)
@@ -0,0 +1,37 @@
+"""Тесты прогрева воркера при запуске (app.lifespan)."""
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from app import lifespan
+
+
+def test_unreachable_replica_does_not_block_warm_up(monkeypatch):
+    primary = SimpleNamespace(url=SimpleNamespace(host="primary"))
+    replica = SimpleNamespace(url=SimpleNamespace(host="replica"))
+    warmed, primed = [], []
+
+    async def warm_up_engine(engine, connections):
+        if engine is replica:
+            raise OSError("connection refused")
+        warmed.append(engine)
+
+    @asynccontextmanager
+    async def session_maker():
+        yield "session"
+
+    async def snapshot(session):
+        primed.append(session)
+
+    monkeypatch.setattr(lifespan, "async_engine", primary)
+    monkeypatch.setattr(lifespan, "replica_engines", [replica])
+    monkeypatch.setattr(lifespan, "warm_up_engine", warm_up_engine)
+    monkeypatch.setattr(lifespan, "async_session_maker", session_maker)
+    monkeypatch.setattr(lifespan.category_cache, "snapshot", snapshot)
+    monkeypatch.setattr(lifespan, "worker_state", lifespan.WorkerState())
+
+    asyncio.run(lifespan.start_worker())
+
+    assert warmed == [primary]
+    assert primed == ["session"]
+    assert lifespan.worker_state.ready
@@ -0,0 +1,113 @@
+"""
+Бюджеты SQL-запросов на эндпоинт.
+
+Тесты создают в настроенной базе данных категорию, товар и
+пользователей с нужными ролями (benchmarks.query_budget.seed), вызывают
+эндпоинты приложения в процессе (httpx + ASGITransport) и считают
+запросы событием before_cursor_execute. Случаи выполняются по порядку
+на общих данных, поэтому изменяющие запросы стоят в конце списка.
+Если база данных недоступна, тесты пропускаются.
+"""
+import asyncio
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.database import async_engine, replica_engines
+from app.main import app
+from app.replicas import CONNECT_ERRORS
+from benchmarks.query_budget import QueryCounter, seed
+
+# Сколько ждать подключения к базе данных, прежде чем пропустить тесты.
+CONNECT_TIMEOUT = 10
+
+
+def budget(method: str, url: str, max_queries: int, role: str | None = None,
+           body=None):
+    """
+    Случай теста. В url подставляются category_id и product_id
+    созданных данных, body — функция от этих данных.
+    """
+    return pytest.param(method, url, max_queries, role, body,
+                        id=f"{method} {url}")
+
+
+def product_body(data: dict) -> dict:
+    return {"name": "Budget product", "price": 12, "stock": 3,
+            "category_id": data["category_id"]}
+
+
+def review_body(data: dict) -> dict:
+    return {"product_id": data["product_id"], "comment": "ok", "grade": 5}
+
+
+BUDGETS = [
+    # Первый вызов прогревает кэш категорий.
+    budget("GET", "/categories/", 1),
+    budget("GET", "/categories/", 0),
+    budget("GET", "/categories/tree", 0),
+    budget("GET", "/categories/?expand=parent", 0),
+    budget("GET", "/products/", 1),
+    budget("GET", "/products/?category_id={category_id}&sort=-price", 1),
+    budget("GET", "/products/search?q=budget", 2),
+    budget("GET", "/products/category/{category_id}", 1),
+    budget("GET",
+           "/products/category/{category_id}?include_descendants=true", 1),
+    budget("GET", "/products/{product_id}", 1),
+    # Категории встраиваются из кэша, продавцы — одним запросом на страницу.
+    budget("GET", "/products/?expand=category,seller", 2),
+    budget("GET", "/products/search?q=budget&expand=seller", 3),
+    budget("GET",
+           "/products/category/{category_id}?expand=category,seller", 2),
+    budget("GET", "/products/{product_id}?expand=category,seller", 2),
+    budget("PUT", "/products/{product_id}", 3, "seller", product_body),
+    budget("POST", "/reviews", 3, "buyer", review_body),
+    budget("GET", "/products/{product_id}/reviews", 2),
+    budget("GET", "/reviews", 1),
+    budget("GET", "/reviews?expand=product", 2),
+    budget("GET", "/products/{product_id}/reviews?expand=product", 2),
+    budget("DELETE", "/products/{product_id}", 3, "seller"),
+]
+
+
+@pytest.fixture(scope="module")
+def runner():
+    """
+    Один event loop на модуль: соединения пула движка привязаны к loop,
+    в котором открыты.
+    """
+    with asyncio.Runner() as runner:
+        yield runner
+        for engine in (async_engine, *replica_engines):
+            runner.run(engine.dispose())
+
+
+@pytest.fixture(scope="module")
+def data(runner) -> dict:
+    try:
+        return runner.run(asyncio.wait_for(seed(), CONNECT_TIMEOUT))
+    except CONNECT_ERRORS as exc:
+        pytest.skip(f"Database is unavailable: {exc}")
+
+
+@pytest.fixture(scope="module")
+def client(runner):
+    client = AsyncClient(transport=ASGITransport(app=app),
+                         base_url="http://budget")
+    yield client
+    runner.run(client.aclose())
+
+
+@pytest.mark.parametrize(("method", "url", "max_queries", "role", "body"),
+                         BUDGETS)
+def test_query_budget(runner, data, client, method, url, max_queries, role,
+                      body):
+    headers = {}
+    if role is not None:
+        headers["Authorization"] = f"Bearer {data['tokens'][role]}"
+    with QueryCounter() as counter:
+        response = runner.run(client.request(
+            method, url.format(**data), headers=headers,
+            json=body(data) if body is not None else None))
+    assert response.is_success, response.text
+    assert counter.count <= max_queries
@@ -0,0 +1,156 @@
+"""Тесты token bucket из app.rate_limit: бэкенды и зависимость RateLimit."""
+import asyncio
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+import redis.asyncio as redis
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app import cache, rate_limit
+from app.config import config
+from app.rate_limit import Limit, MemoryBackend, RateLimit, RedisBackend
+
+
+class Clock:
+    """Подменяет time.monotonic в app.rate_limit и app.cache."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    fake_time = SimpleNamespace(monotonic=clock.monotonic)
+    monkeypatch.setattr(rate_limit, "time", fake_time)
+    monkeypatch.setattr(cache, "time", fake_time)
+    return clock
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(config, "RATE_LIMIT_ENABLED", True)
+
+
+def test_limit_parse():
+    limit = Limit.parse("10/minute")
+    assert limit.burst == 10
+    assert limit.rate == pytest.approx(10 / 60)
+    assert limit.refill_seconds == pytest.approx(60)
+    for value in ("10", "0/minute", "x/minute", "10/week"):
+        with pytest.raises(ValueError):
+            Limit.parse(value)
+
+
+def test_memory_backend_burst_and_retry_after(clock):
+    backend = MemoryBackend(maxsize=10)
+    limit = Limit.parse("3/minute")
+
+    async def run():
+        hits = [await backend.hit("k", limit) for _ in range(4)]
+        assert hits[:3] == [0.0, 0.0, 0.0]
+        # Корзина пуста, один токен пополняется за 20 секунд.
+        assert hits[3] == pytest.approx(20)
+        clock.now += 5
+        assert await backend.hit("k", limit) == pytest.approx(15)
+
+    asyncio.run(run())
+
+
+def test_memory_backend_refill(clock):
+    backend = MemoryBackend(maxsize=10)
+    limit = Limit.parse("3/minute")
+
+    async def run():
+        for _ in range(3):
+            await backend.hit("k", limit)
+        clock.now += 20
+        assert await backend.hit("k", limit) == 0.0
+        assert await backend.hit("k", limit) == pytest.approx(20)
+        # Корзина не наполняется сверх burst.
+        clock.now += 3600
+        hits = [await backend.hit("k", limit) for _ in range(4)]
+        assert hits == [0.0, 0.0, 0.0, pytest.approx(20)]
+        # У другого ключа своя корзина.
+        assert await backend.hit("other", limit) == 0.0
+
+    asyncio.run(run())
+
+
+def test_redis_backend_burst_and_retry_after():
+    limit = Limit.parse("3/minute")
+
+    async def run():
+        backend = RedisBackend(fakeredis.FakeAsyncRedis())
+        hits = [await backend.hit("k", limit) for _ in range(4)]
+        assert hits[:3] == [0.0, 0.0, 0.0]
+        assert hits[3] == pytest.approx(20, abs=0.1)
+        ttl = await backend.client.pttl("rate-limit:k")
+        assert 0 < ttl <= limit.refill_seconds * 1000
+
+    asyncio.run(run())
+
+
+def test_redis_backend_refill():
+    limit = Limit.parse("3/minute")
+
+    async def run():
+        client = fakeredis.FakeAsyncRedis()
+        backend = RedisBackend(client)
+        seconds, micros = await client.time()
+        # Пустая корзина, обновлённая 5 секунд назад по часам Redis.
+        await client.hset("rate-limit:k", mapping={
+            "tokens": 0, "ts": seconds + micros / 1_000_000 - 5})
+        assert await backend.hit("k", limit) == pytest.approx(15, abs=0.1)
+        # Прошло 25 секунд: накопился токен и четверть следующего.
+        await client.hset("rate-limit:k", mapping={
+            "tokens": 0, "ts": seconds + micros / 1_000_000 - 25})
+        assert await backend.hit("k", limit) == 0.0
+        assert await backend.hit("k", limit) == pytest.approx(15, abs=0.1)
+
+    asyncio.run(run())
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+
+    @app.get("/limited", dependencies=[Depends(RateLimit("test", "2/minute"))])
+    async def limited():
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_rate_limit_dependency_returns_429(monkeypatch, clock, enabled):
+    monkeypatch.setattr(rate_limit, "rate_limiter", MemoryBackend(maxsize=10))
+    client = make_client()
+    assert client.get("/limited").status_code == 200
+    assert client.get("/limited").status_code == 200
+    response = client.get("/limited")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
+    assert response.json() == {"detail": "Too many requests"}
+    clock.now += 30
+    assert client.get("/limited").status_code == 200
+
+
+def test_rate_limit_dependency_disabled(monkeypatch, clock):
+    monkeypatch.setattr(config, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(rate_limit, "rate_limiter", MemoryBackend(maxsize=10))
+    client = make_client()
+    assert all(client.get("/limited").status_code == 200 for _ in range(5))
+
+
+def test_rate_limit_dependency_allows_when_redis_down(monkeypatch, enabled):
+    class Unavailable:
+        async def hit(self, key, limit):
+            raise redis.ConnectionError("connection refused")
+
+    monkeypatch.setattr(rate_limit, "rate_limiter", Unavailable())
+    client = make_client()
+    assert all(client.get("/limited").status_code == 200 for _ in range(5))